@@ -0,0 +1,48 @@
+# Compare the windowing engine in transcript.chunk against the original
+# per-window scan on synthetic transcripts.
+#   python bench/bench_chunk.py --cues 10000 100000
+import argparse, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from transcript import chunk, iter_vtt
+from synth_vtt import synth_lines
+
+def _sec(ts):  # original string-splitting timestamp parser, kept as reference
+    h,m,s = ts.split(":"); s,ms = s.split(".")
+    return int(h)*3600 + int(m)*60 + int(s) + int(ms)/1000
+
+def synth_segs(n, seed=0, **kw):  # well-formed cues, so the string-based reference can read them
+    return list(iter_vtt(synth_lines(cues=n, seed=seed, malformed=0, **kw)))
+
+def chunk_scan(segs, window=360, overlap=20):  # original implementation, kept as reference
+    if not segs: return []
+    start_all, end_all = _sec(segs[0]["start"]), _sec(segs[-1]["end"])
+    out=[]; cur=start_all
+    while cur < end_all:
+        wend = cur + window
+        items = [s for s in segs if _sec(s["start"]) < wend and _sec(s["end"]) > cur]
+        out.append({"start":cur,"end":min(wend,end_all),"items":items})
+        cur = wend - overlap
+    return out
+
+def timed(fn, *a):
+    t = time.perf_counter(); r = fn(*a); return r, time.perf_counter() - t
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cues", type=int, nargs="+", default=[10000, 100000])
+    ap.add_argument("--skip-scan", action="store_true", help="only time the windowing engine")
+    args = ap.parse_args()
+    for n in args.cues:
+        segs = synth_segs(n)
+        new, t_new = timed(chunk, segs)
+        line = f"{n:>8} cues  {len(new):>5} windows  engine {t_new*1000:9.1f} ms"
+        if not args.skip_scan:
+            old, t_old = timed(chunk_scan, segs)
+            assert old == new, "windowing engine output differs from scan"
+            line += f"  scan {t_old*1000:10.1f} ms  speedup {t_old/t_new:7.1f}x"
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# End-to-end extraction throughput against bench/mock_groq.py (no API quota).
+# Builds synthetic transcripts of the given lengths, runs parse -> chunk ->
+# extract_topics -> reduce through mom_core with the real client, rate limiter
+# and retry policy, and reports wall time, per-chunk latency and requests/sec.
+#   python bench/bench_e2e.py --hours 1 4 12 --p50 0.8 --p95 2.5 --rate-429 0.05
+# --max-prompt-tokens below CHUNK_TOKENS makes the mock reject every chunk as
+# too long, so each one goes through the split path (errors should stay 0):
+#   python bench/bench_e2e.py --hours 1 --p50 0.01 --p95 0.02 --max-prompt-tokens 1500
+import argparse, asyncio, io, os, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from synth_vtt import synth_bytes
+from mock_groq import MockGroq
+from diagnostics import collect
+
+def pct(xs, p):
+    xs = sorted(xs)
+    return xs[min(len(xs)-1, int(round(p/100*(len(xs)-1))))] if xs else float("nan")
+
+async def run_one(core, hours, args):
+    data = synth_bytes(hours=hours)
+    segs = core.parse_transcript(io.BytesIO(data))
+    _, chs = core.chunk_transcript(segs)
+    latencies, call = [], core.call_groq
+    async def timed_call(*a, **kw):
+        t = time.perf_counter()
+        try:
+            return await call(*a, **kw)
+        finally:
+            latencies.append(time.perf_counter() - t)
+    core.call_groq = timed_call
+    try:
+        t = time.perf_counter()
+        with collect() as stats:
+            topics, errors = await core.extract_topics(chs)
+        wall = time.perf_counter() - t
+    finally:
+        core.call_groq = call
+    return len(chs), wall, latencies, len(topics), len(errors), stats.counters["chunk_splits"]
+
+async def main_async(args):
+    mock = MockGroq(args.p50, args.p95, args.rate_429, args.retry_after, args.seed, tpm=args.tpm,
+                    max_prompt_tokens=args.max_prompt_tokens)
+    port = await mock.start()
+    os.environ.update(GROQ_API_KEY="mock", GROQ_BASE_URL=f"http://127.0.0.1:{port}/openai/v1",
+                      GROQ_STREAM="true" if args.stream else "false", LLM_CACHE_PATH="",
+                      GROQ_CONCURRENCY=str(args.concurrency), GROQ_RPM=str(args.rpm), GROQ_TPM=str(args.tpm))
+    import mom_core as core
+    core.configure({})
+    print(f"mock p50={args.p50}s p95={args.p95}s 429={args.rate_429:.0%} stream={args.stream} concurrency={args.concurrency}")
+    print(f"{'hours':>5} {'chunks':>6} {'wall s':>8} {'p50 s':>7} {'p95 s':>7} {'req/s':>7} {'topics':>6} {'errors':>6} {'splits':>6}")
+    try:
+        for h in args.hours:
+            before = mock.requests
+            n, wall, lat, topics, errors, splits = await run_one(core, h, args)
+            print(f"{h:>5g} {n:>6} {wall:>8.2f} {pct(lat, 50):>7.2f} {pct(lat, 95):>7.2f} {(mock.requests-before)/wall:>7.1f} "
+                  f"{topics:>6} {errors:>6} {splits:>6}")
+    finally:
+        await mock.close()
+    print(f"mock served {mock.requests} requests, {mock.rejected} rejected with 429, {mock.overflowed} as too long")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hours", type=float, nargs="+", default=[1, 4, 12])
+    ap.add_argument("--p50", type=float, default=0.8)
+    ap.add_argument("--p95", type=float, default=2.5)
+    ap.add_argument("--rate-429", type=float, default=0.0)
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--stream", action="store_true")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rpm", type=int, default=6000)
+    ap.add_argument("--tpm", type=int, default=10_000_000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-prompt-tokens", type=int, default=0)
+    asyncio.run(main_async(ap.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# Memory and time of the list-of-dicts pipeline vs SegmentTable on synthetic
+# transcripts (parse -> merge_short -> chunk -> fmt_chunk).
+#   python bench/bench_segments.py --cues 10000 100000
+import argparse, io, sys, time, tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from transcript import SegmentTable, iter_vtt, merge_short, chunk, fmt_chunk
+from synth_vtt import synth_bytes
+
+def run_dicts(data):
+    segs = merge_short(iter_vtt(io.BytesIO(data)))
+    return segs, chunk(segs)
+
+def run_table(data):
+    segs = merge_short(SegmentTable.from_vtt(io.BytesIO(data)))
+    return segs, chunk(segs)
+
+def measure(fn, data):  # timed untraced, then re-run under tracemalloc
+    t = time.perf_counter(); fn(data); dt = time.perf_counter() - t
+    tracemalloc.start()
+    out = fn(data)
+    cur, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, dt, cur, peak
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cues", type=int, nargs="+", default=[10000, 100000])
+    args = ap.parse_args()
+    mb = 1 / (1 << 20)
+    for n in args.cues:
+        data = synth_bytes(cues=n)
+        (d_segs, d_chs), d_t, d_cur, d_peak = measure(run_dicts, data)
+        (t_segs, t_chs), t_t, t_cur, t_peak = measure(run_table, data)
+        assert [fmt_chunk(c) for c in d_chs] == [fmt_chunk(c) for c in t_chs], "outputs differ"
+        print(f"{n:>8} cues  dicts {d_t*1000:8.1f} ms  retained {d_cur*mb:7.1f} MB  peak {d_peak*mb:7.1f} MB")
+        print(f"{'':>8}       table {t_t*1000:8.1f} ms  retained {t_cur*mb:7.1f} MB  peak {t_peak*mb:7.1f} MB")
+
+if __name__ == "__main__":
+    main()
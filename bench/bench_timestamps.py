@@ -0,0 +1,58 @@
+# Micro-benchmark: timestamps re-parsed from strings at every use (old path)
+# vs captured once as milliseconds from the CUE_RE groups (new path).
+#   python bench/bench_timestamps.py --cues 100000
+import argparse, re, sys, timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from transcript import CUE_RE, _groups_ms, parse_vtt, merge_short, chunk, windows
+from bench_chunk import synth_segs, _sec
+
+OLD_CUE_RE = re.compile(r"(?P<start>\d{2}:\d{2}:\d{2}\.\d{3})\s*-->\s*(?P<end>\d{2}:\d{2}:\d{2}\.\d{3})")
+
+def old_merge_short(segs, gap=3):
+    merged=[]
+    for s in segs:
+        if merged and s["speaker"]==merged[-1]["speaker"]:
+            if 0 <= _sec(s["start"]) - _sec(merged[-1]["end"]) <= gap:
+                merged[-1]["end"]=s["end"]; merged[-1]["text"]+=" "+s["text"]; continue
+        merged.append(s)
+    return merged
+
+def old_pipeline(segs):  # string dicts; _sec() in merge, chunk and the UI duration
+    segs = old_merge_short([{"start": s["start"], "end": s["end"], "speaker": s["speaker"], "text": s["text"]} for s in segs])
+    starts, ends = [_sec(s["start"]) for s in segs], [_sec(s["end"]) for s in segs]
+    list(windows(starts, ends, starts[0], ends[-1]))
+    return _sec(segs[-1]["end"]) - _sec(segs[0]["start"])
+
+def new_pipeline(segs):
+    segs = merge_short([dict(s) for s in segs])
+    chunk(segs)
+    return (segs[-1]["end_ms"] - segs[0]["start_ms"])/1000
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cues", type=int, default=100000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    segs = synth_segs(args.cues)
+    lines = [f'{s["start"]} --> {s["end"]}' for s in segs]
+
+    def old_cues():
+        for ln in lines:
+            m = OLD_CUE_RE.match(ln); _sec(m.group("start")); _sec(m.group("end"))
+    def new_cues():
+        for ln in lines:
+            _, sh, sm, ss, sf, _, eh, em, es, ef = CUE_RE.match(ln).groups()
+            _groups_ms(sh, sm, ss, sf); _groups_ms(eh, em, es, ef)
+    parsed = parse_vtt("\n\n".join(f"{ln}\n{s['speaker']}: {s['text']}" for ln, s in zip(lines, segs)))
+    old_segs = [{k: v for k, v in s.items() if not k.endswith("_ms")} for s in parsed]
+
+    def best(fn): return min(timeit.repeat(fn, number=1, repeat=args.repeat)) * 1000
+    print(f"{args.cues} cues")
+    print(f"  cue line -> seconds   old {best(old_cues):8.1f} ms   new {best(new_cues):8.1f} ms")
+    o, n = best(lambda: old_pipeline(old_segs)), best(lambda: new_pipeline(parsed))
+    print(f"  merge+chunk+duration  old {o:8.1f} ms   new {n:8.1f} ms   speedup {o/n:5.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Deterministic stand-in for Groq's OpenAI-compatible /chat/completions
+# endpoint, for benchmarks that must not spend API quota. Plain asyncio
+# HTTP/1.1 with keep-alive. Latency is log-normal (median and p95 are
+# configurable), a configurable share of requests gets a 429 with retry-after,
+# "stream": true requests get SSE chunks, and prompts over max_prompt_tokens
+# get Groq's 400 context_length_exceeded.
+# Use it by pointing GROQ_BASE_URL at it:
+#   python bench/mock_groq.py --port 8765 --p50 0.8 --p95 2.5 --rate-429 0.05
+#   GROQ_BASE_URL=http://127.0.0.1:8765/openai/v1 GROQ_API_KEY=x python mom_generate.py ...
+import argparse, asyncio, hashlib, json, math, random
+
+class MockGroq:
+    def __init__(self, p50=0.8, p95=2.5, rate_429=0.0, retry_after=1.0, seed=0, stream_chunk=24, tpm=1_000_000,
+                 max_prompt_tokens=0):
+        self.mu = math.log(p50)
+        self.sigma = max(1e-9, (math.log(p95) - self.mu) / 1.645) if p95 > p50 else 0.0
+        self.rate_429, self.retry_after, self.stream_chunk, self.tpm = rate_429, retry_after, stream_chunk, tpm
+        self.max_prompt_tokens = max_prompt_tokens
+        self.rng = random.Random(seed)
+        self.requests = self.rejected = self.overflowed = 0
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.server = await asyncio.start_server(self._conn, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    WORDS = ("budget roadmap hiring launch pricing vendor security audit migration latency onboarding churn "
+             "forecast compliance backlog release staffing contract renewal incident outage retention campaign "
+             "partner integration analytics dashboard billing refund support training offsite quota").split()
+
+    def answer(self, prompt):  # same prompt -> same topics
+        h = hashlib.sha256(prompt.encode()).digest()
+        w = lambda i: self.WORDS[h[i % len(h)] % len(self.WORDS)]
+        return {"topics": [{
+            "title": f"{w(k*6).title()} {w(k*6+1)}",
+            "discussion": [f"Discussed {w(k*6)} {w(k*6+2)} and {w(k*6+3)}.", f"Agreed to revisit {w(k*6+4)} after {w(k*6+5)}."],
+            "actions": [{"task": f"Draft {w(k*6)} {w(k*6+1)} plan", "owner": "Unassigned", "due": None}]}
+            for k in range(1 + h[31] % 3)]}
+
+    async def _conn(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""): break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                await self._handle(line.decode("latin-1").split()[1], json.loads(body or b"{}"), writer)
+                if headers.get("connection", "").lower() == "close": break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, path, req, writer):
+        self.requests += 1
+        delay = math.exp(self.rng.gauss(self.mu, self.sigma))
+        limited = self.rng.random() < self.rate_429
+        if not path.endswith("/chat/completions"):
+            return self._send(writer, 404, {"error": {"type": "not_found", "message": path}})
+        await asyncio.sleep(delay)
+        rl = {"x-ratelimit-limit-tokens": str(self.tpm), "x-ratelimit-remaining-tokens": str(self.tpm)}
+        if limited:
+            self.rejected += 1
+            return self._send(writer, 429, {"error": {"type": "rate_limit_exceeded", "message": "Rate limit reached (mock)"}},
+                              {**rl, "retry-after": str(self.retry_after), "x-ratelimit-remaining-tokens": "0"})
+        prompt = "".join(m.get("content", "") for m in req.get("messages", []))
+        if self.max_prompt_tokens and len(prompt)//4 > self.max_prompt_tokens:
+            self.overflowed += 1
+            return self._send(writer, 400, {"error": {"type": "invalid_request_error", "code": "context_length_exceeded",
+                                                      "message": "Please reduce the length of the messages or completion."}}, rl)
+        content = json.dumps(self.answer(prompt))
+        usage = {"prompt_tokens": len(prompt)//4, "completion_tokens": len(content)//4, "total_tokens": (len(prompt) + len(content))//4}
+        if not req.get("stream"):
+            return self._send(writer, 200, {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}], "usage": usage}, rl)
+        writer.write(self._head(200, {**rl, "content-type": "text/event-stream", "transfer-encoding": "chunked"}))
+        for i in range(0, len(content), self.stream_chunk):
+            self._chunk(writer, {"choices": [{"index": 0, "delta": {"content": content[i:i+self.stream_chunk]}}]})
+            await writer.drain()
+            await asyncio.sleep(0)
+        self._chunk(writer, {"choices": [], "x_groq": {"usage": usage}})
+        writer.write(self._chunked(b"data: [DONE]\n\n") + b"0\r\n\r\n")
+        await writer.drain()
+
+    def _head(self, status, headers):
+        lines = [f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}"] + [f"{k}: {v}" for k, v in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    def _send(self, writer, status, obj, headers=None):
+        body = json.dumps(obj).encode()
+        writer.write(self._head(status, {**(headers or {}), "content-type": "application/json", "content-length": len(body)}) + body)
+
+    def _chunked(self, data):
+        return f"{len(data):x}\r\n".encode() + data + b"\r\n"
+
+    def _chunk(self, writer, event):
+        writer.write(self._chunked(f"data: {json.dumps(event)}\n\n".encode()))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--p50", type=float, default=0.8, help="median latency (s)")
+    ap.add_argument("--p95", type=float, default=2.5, help="95th percentile latency (s)")
+    ap.add_argument("--rate-429", type=float, default=0.0, help="share of requests rejected with 429")
+    ap.add_argument("--retry-after", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--max-prompt-tokens", type=int, default=0, help="reject longer prompts as context overflow")
+    args = ap.parse_args()
+    async def serve():
+        mock = MockGroq(args.p50, args.p95, args.rate_429, args.retry_after, args.seed,
+                        max_prompt_tokens=args.max_prompt_tokens)
+        port = await mock.start(port=args.port)
+        print(f"mock Groq on http://127.0.0.1:{port}/openai/v1", flush=True)
+        await asyncio.Event().wait()
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Synthetic WebVTT transcripts for parser, merge, chunk and end-to-end
+# benchmarks. The output looks like real meeting exports: N speakers taking
+# turns in runs, cue length following speaking rate, optional cue ids and
+# NOTE blocks, multi-line cues, cues without a "Name:" prefix, silences, and a
+# share of malformed blocks the parser must skip. Lines are produced lazily,
+# so files of any size (GB-scale included) are written with flat memory.
+#   python bench/synth_vtt.py out.vtt --hours 4 --speakers 6
+#   python bench/synth_vtt.py big.vtt --size-mb 2048
+import argparse, random, sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from transcript import _ts
+
+NAMES = ("Alice Johnson", "Bob Smith", "Carol Diaz", "Dev Patel", "Erin O'Neil", "Farah Khan",
+         "Gus Miller", "Hana Sato", "Ivan Petrov", "Jade Wu", "Kofi Mensah", "Lena Fischer")
+WORDS = ("we", "need", "to", "the", "budget", "for", "next", "quarter", "I", "think", "launch", "is", "on",
+         "track", "but", "vendor", "contract", "still", "open", "can", "you", "send", "update", "by", "Friday",
+         "customers", "asked", "about", "pricing", "migration", "should", "finish", "before", "release", "so",
+         "let's", "review", "dashboard", "numbers", "again", "hiring", "plan", "approved", "security", "audit",
+         "found", "two", "issues", "and", "roadmap", "agreed", "yes", "okay", "right", "exactly", "maybe", "later")
+
+def synth_lines(cues=None, hours=None, speakers=4, seed=0, wps=2.6, turn_run=0.6, multiline=0.15,
+                no_speaker=0.05, gap=0.03, malformed=0.01, ids=True, notes=0.002, variants=0.0):
+    # Yields the file line by line (without newlines). Stops after `cues` cues
+    # or `hours` of audio, whichever is given.
+    rnd = random.Random(seed)
+    names = [NAMES[k % len(NAMES)] + ("" if k < len(NAMES) else f" {k // len(NAMES) + 1}") for k in range(speakers)]
+    limit_ms = int(hours*3600000) if hours else None
+    t, spk, n = 0, 0, 0
+    yield "WEBVTT"
+    yield ""
+    while (cues is None or n < cues) and (limit_ms is None or t < limit_ms):
+        n += 1
+        if rnd.random() > turn_run:
+            spk = rnd.randrange(speakers)
+        words = [rnd.choice(WORDS) for _ in range(min(40, max(1, int(rnd.expovariate(1/10)))))]
+        dur = max(400, int(len(words)/wps*1000*rnd.uniform(0.8, 1.25)))
+        t += rnd.randint(5000, 60000) if rnd.random() < gap else rnd.randint(0, 400)
+        if rnd.random() < notes:
+            yield "NOTE speaker diarization confidence low"
+            yield ""
+        if ids: yield str(n)
+        start, end = _ts(t), _ts(t + dur)
+        r = rnd.random()
+        if r < malformed:
+            yield rnd.choice([f"{start} -> {end}", f"{start[:-4]} --> {end}", f"{start}-{end}", f"xx:{start[3:]} --> {end}"])
+        elif r < malformed + variants:
+            yield f"{start[3:]} --> {end[3:]}" if t + dur < 3600000 else f"{start.replace('.', ',')} --> {end.replace('.', ',')}"
+        else:
+            yield f"{start} --> {end}" + (" align:start position:10%" if rnd.random() < 0.05 else "")
+        text = " ".join(words).capitalize() + rnd.choice(".?!")
+        if rnd.random() >= no_speaker:
+            text = f"{names[spk]}: {text}"
+        if rnd.random() < multiline and len(text) > 42:
+            cut = text.rfind(" ", 0, 42)
+            if cut > 0:
+                yield text[:cut]
+                text = text[cut+1:]
+        yield text
+        yield ""
+        t += dur
+
+def synth_bytes(**kw):
+    return ("\n".join(synth_lines(**kw)) + "\n").encode()
+
+def write_vtt(path, size_mb=None, **kw):
+    # Streams lines to `path`; with size_mb, generates cues until the file is that large.
+    limit = int(size_mb*(1 << 20)) if size_mb else None
+    if limit: kw.setdefault("cues", None)
+    written = 0
+    with open(path, "w", encoding="utf-8", newline="\n", buffering=1 << 20) as f:
+        for line in synth_lines(**kw):
+            f.write(line); f.write("\n")
+            written += len(line) + 1
+            if limit and written >= limit and line == "":
+                break
+    return written
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("out", help="output .vtt path ('-' for stdout)")
+    g = ap.add_mutually_exclusive_group(required=True)
+    g.add_argument("--cues", type=int)
+    g.add_argument("--hours", type=float)
+    g.add_argument("--size-mb", type=float)
+    ap.add_argument("--speakers", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--wps", type=float, default=2.6, help="speaking rate, words/second (cue density)")
+    ap.add_argument("--multiline", type=float, default=0.15)
+    ap.add_argument("--no-speaker", type=float, default=0.05)
+    ap.add_argument("--gap", type=float, default=0.03, help="share of cues preceded by a 5-60s silence")
+    ap.add_argument("--malformed", type=float, default=0.01)
+    ap.add_argument("--variants", type=float, default=0.0, help="share of MM:SS.mmm / comma timestamps")
+    args = ap.parse_args()
+    kw = dict(cues=args.cues, hours=args.hours, speakers=args.speakers, seed=args.seed, wps=args.wps,
+              multiline=args.multiline, no_speaker=args.no_speaker, gap=args.gap,
+              malformed=args.malformed, variants=args.variants)
+    if args.out == "-":
+        for line in synth_lines(**kw): sys.stdout.write(line + "\n")
+    else:
+        n = write_vtt(args.out, args.size_mb, **kw)
+        print(f"wrote {n/(1 << 20):.1f} MB to {args.out}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
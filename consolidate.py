@@ -0,0 +1,110 @@
+import re, json, asyncio, logging
+from collections import defaultdict
+from diagnostics import count
+
+# ----- Reduce stage: consolidate topics extracted per chunk -----
+# A subject discussed across several chunks comes back as several topics.
+# Locally, topics are clustered by word overlap of their titles and discussion
+# (candidate pairs come from an inverted index on title words, so unrelated
+# topics are never compared), and each cluster is merged into one topic whose
+# bullets/actions keep chunk order with exact repeats removed. Optionally an
+# LLM pass then fans groups of `fan_in` topics into fewer ones, for at most
+# `max_depth` levels.
+
+log = logging.getLogger("consolidate")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOP = frozenset("""a an and are as at be by for from has have in into is it its of on or that the
+this to was were will with we our discussion discussed update updates review meeting team""".split())
+
+def _words(text):
+    return {w for w in _WORD_RE.findall(str(text).lower()) if len(w) > 2 and w not in _STOP}
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+def _norm(text):
+    return " ".join(_WORD_RE.findall(str(text).lower()))
+
+# Features are (title words, discussion words, normalized title); identical
+# titles count as a full title match even when they have no indexable words.
+def _features(t):
+    title = str(t.get("title", ""))
+    return _words(title), _words(" ".join(map(str, t.get("discussion", [])))), _norm(title)
+
+def topic_similarity(ta, tb):
+    title = 1.0 if ta[2] and ta[2] == tb[2] else _jaccard(ta[0], tb[0])
+    return 0.6*title + 0.4*_jaccard(ta[1], tb[1])
+
+def cluster_topics(topics, threshold=0.35):
+    feats = [_features(t) for t in topics]
+    parent = list(range(len(topics)))
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]; x = parent[x]
+        return x
+    index = defaultdict(list)
+    for k, (title, _, norm) in enumerate(feats):
+        seen = set()
+        for w in title | {"=" + norm}:
+            for other in index[w]:
+                if other in seen: continue
+                seen.add(other)
+                if topic_similarity(feats[k], feats[other]) >= threshold:
+                    parent[find(k)] = find(other)
+            index[w].append(k)
+    groups = defaultdict(list)
+    for k in range(len(topics)):
+        groups[find(k)].append(k)
+    return sorted(groups.values(), key=lambda g: g[0])  # first-mention order
+
+def merge_topics(group):
+    titles = [t.get("title") for t in group if t.get("title")]
+    title = max(titles, key=lambda s: (titles.count(s), -len(s))) if titles else "(untitled)"
+    discussion, actions, seen_d, seen_a = [], [], set(), set()
+    for t in group:
+        for d in t.get("discussion", []):
+            k = _norm(d)
+            if k not in seen_d: seen_d.add(k); discussion.append(d)
+        for a in t.get("actions", []):
+            k = _norm(a.get("task", "")) if isinstance(a, dict) else _norm(a)
+            if k not in seen_a: seen_a.add(k); actions.append(a)
+    return {"title": title, "discussion": discussion, "actions": actions}
+
+def consolidate_local(topics, threshold=0.35):
+    return [merge_topics([topics[k] for k in g]) for g in cluster_topics(topics, threshold)]
+
+def build_reduce_prompt(topics) -> str:
+    return f"""
+You are consolidating meeting minutes that were summarized in separate parts.
+
+Merge topics that cover the same subject into one topic: combine their discussion
+bullets (drop repeats, keep every distinct fact and decision) and their actions
+(drop duplicates, keep owners and due dates). Keep unrelated topics separate and
+keep them in the order they were first discussed. Do not invent facts.
+
+Return JSON in the same structure: {{"topics": [{{"title": "...", "discussion": [...], "actions": [...]}}]}}
+
+Topics:
+{json.dumps({"topics": topics}, ensure_ascii=False)}
+"""
+
+# `call(prompt)` is an async function returning (result_json, error). A group
+# whose call fails is merged locally instead; nothing is lost, so that is
+# counted ("reduce_fallbacks") and logged rather than reported as an error.
+async def consolidate_llm(topics, call, fan_in=8, max_depth=2):
+    async def reduce(group):
+        if len(group) < 2: return group
+        result, err = await call(build_reduce_prompt(group))
+        merged = (result or {}).get("topics") if isinstance(result, dict) else None
+        if err or not isinstance(merged, list) or not merged:
+            count("reduce_fallbacks")
+            log.info("LLM reduce fell back to local merge: %s", err or "no topics in answer")
+            return consolidate_local(group)
+        return [t for t in merged if isinstance(t, dict)]
+    for _ in range(max_depth):
+        if len(topics) <= fan_in:
+            topics = await reduce(topics)
+            break
+        groups = [topics[k:k+fan_in] for k in range(0, len(topics), fan_in)]
+        topics = [t for g in await asyncio.gather(*map(reduce, groups)) for t in g]
+    return topics
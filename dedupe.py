@@ -0,0 +1,71 @@
+import re, math
+from collections import Counter, defaultdict
+
+# ----- Near-duplicate bullets and actions -----
+# Overlapping chunks make the model repeat the same point with slightly
+# different wording. Items are compared as normalized word sets with Jaccard
+# similarity; candidate pairs come from a prefix-filtered inverted index (each
+# set indexes only its rarest words, which any pair above the threshold must
+# share), so the work stays far below all-pairs even for thousands of items.
+# Each group of near-duplicates collapses to its richest variant, kept at the
+# position of the first mention.
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOP = frozenset("a an and are as at be by for from has in is it of on or that the to was were will with".split())
+
+def _tokens(text):
+    return {w for w in _WORD_RE.findall(str(text).lower()) if w not in _STOP}
+
+def near_duplicate_groups(texts, threshold=0.7):
+    sets = [_tokens(t) for t in texts]
+    freq = Counter(w for s in sets for w in s)
+    parent = list(range(len(texts)))
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]; x = parent[x]
+        return x
+    lens = [len(s) for s in sets]
+    index = defaultdict(list)
+    for k in sorted(range(len(sets)), key=lens.__getitem__):
+        s, ls = sets[k], lens[k]
+        if not ls: continue
+        prefix = sorted(s, key=lambda w: (freq[w], w))[:ls - math.ceil(threshold*ls) + 1]
+        lo = threshold*ls  # size filter: sets arrive in ascending size
+        for other in set().union(*[index[w] for w in prefix]):
+            lo_o = lens[other]
+            if lo_o >= lo and len(s & sets[other]) >= threshold/(1+threshold)*(ls + lo_o):
+                parent[find(k)] = find(other)
+        for w in prefix:
+            index[w].append(k)
+    groups = defaultdict(list)
+    for k in range(len(texts)):
+        groups[find(k)].append(k)
+    return sorted(groups.values(), key=lambda g: g[0])
+
+def _action_richness(a):
+    if not isinstance(a, dict): return (0, 0, len(str(a)))
+    owner = str(a.get("owner") or "").strip().lower() not in ("", "unassigned")
+    return (owner + bool(a.get("due")), len(str(a.get("task", ""))), 0)
+
+# -> [(first_index, richest_index)] per group, in first-mention order
+def _collapse(items, key, richness, threshold):
+    groups = near_duplicate_groups([key(x) for x in items], threshold)
+    return [(g[0], max(g, key=lambda k: richness(items[k]))) for g in groups]
+
+def _action_task(a):
+    return a.get("task", "") if isinstance(a, dict) else a
+
+def dedupe_topics(topics, threshold=0.7):
+    # Bullets/actions are deduplicated across the whole meeting; a collapsed
+    # item stays in the topic where it was first mentioned.
+    for field, key, richness in (("discussion", str, lambda d: len(str(d))),
+                                 ("actions", _action_task, _action_richness)):
+        flat = [(ti, x) for ti, t in enumerate(topics) for x in (t.get(field) or [])]
+        if len(flat) < 2: continue
+        items = [x for _, x in flat]
+        by_topic = defaultdict(list)
+        for first, best in _collapse(items, key, richness, threshold):
+            by_topic[flat[first][0]].append(items[best])
+        for ti, t in enumerate(topics):
+            t[field] = by_topic.get(ti, [])
+    return topics
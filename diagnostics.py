@@ -0,0 +1,64 @@
+import time, inspect, functools
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# ----- Per-run stage timings and counters -----
+# A run records into the RunStats opened by `with collect() as stats:`; the
+# pipeline reports through stage(name) / count(name, n) / @timed(name), which
+# find the current RunStats in a ContextVar (asyncio tasks inherit it). Outside
+# a collect() block they cost one ContextVar lookup and return a shared no-op.
+
+_current = ContextVar("run_stats", default=None)
+_NULL = nullcontext()
+
+class RunStats:
+    def __init__(self):
+        self.seconds = Counter()   # wall time per stage; concurrent stages add up
+        self.calls = Counter()
+        self.counters = Counter()
+
+    @contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - t
+            self.calls[name] += 1
+
+    def as_dict(self):
+        return {"stages": {k: {"ms": round(v*1000, 1), "calls": self.calls[k]} for k, v in self.seconds.items()},
+                "counters": dict(self.counters)}
+
+@contextmanager
+def collect(enabled=True, stats=None):
+    # Pass `stats` to keep recording into an earlier run's RunStats.
+    if not enabled:
+        yield None
+        return
+    stats = stats or RunStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+def stage(name):
+    s = _current.get()
+    return s.stage(name) if s else _NULL
+
+def count(name, n=1):
+    s = _current.get()
+    if s and n: s.counters[name] += n
+
+def timed(name):
+    def wrap(fn):
+        if inspect.iscoroutinefunction(fn):
+            async def run(*a, **kw):
+                with stage(name): return await fn(*a, **kw)
+        else:
+            def run(*a, **kw):
+                with stage(name): return fn(*a, **kw)
+        return functools.wraps(fn)(run)
+    return wrap
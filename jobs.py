@@ -0,0 +1,141 @@
+import io, json, time, zlib, sqlite3, asyncio, threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import mom_core as core
+from diagnostics import collect
+from usage import tally
+
+# ----- Background extraction jobs -----
+# Summarizing runs on a worker pool owned by the server process, not in the
+# Streamlit script thread, so a rerun, reload or closed tab doesn't drop
+# in-flight Groq work, and every session shares the same workers. Jobs are
+# keyed by the transcript hash plus the settings that shape the result; a
+# second submit of the same key (another user, or the same one after a
+# reload) attaches to the existing job. State, progress and results live in
+# SQLite: the UI polls get(), and jobs left queued or running by a previous
+# process are restarted on startup (chunks already answered come from the
+# LLM result cache). Transcripts are kept, compressed, only until their job
+# finishes; finished jobs expire after `ttl` seconds. All jobs send through one
+# RateLimiter, which admits each meeting's requests fairly (see ratelimit).
+
+def job_key(digest):
+    models = ",".join([core.GROQ_MODEL, core.GROQ_LARGE_MODEL, str(core.ROUTE_LARGE_TOKENS), *core.GROQ_FALLBACK_MODELS])
+    return core.cache_key(models, core.TEMPERATURE, digest,
+                          f"{core.chunk_budget()[0]}|{core.MEETING_TOKEN_CEILING}|{core.REDUCE_MODE}|{core.DEDUPE_THRESHOLD}")
+
+def _pack(obj):
+    return zlib.compress(json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob)) if blob else None
+
+class JobQueue:
+    def __init__(self, path, workers=8, cache=None, ttl=7*86400, limiter=None):
+        self.path, self.cache, self.ttl = Path(path), cache, ttl
+        self.limiter = limiter or core.make_rate_limiter()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            key TEXT PRIMARY KEY, status TEXT NOT NULL, data BLOB, total INTEGER, done INTEGER NOT NULL,
+            partial BLOB, result BLOB, error TEXT, created REAL NOT NULL, updated REAL NOT NULL)""")
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mom-job")
+        self._reuse = {}  # key -> (session's chunk reuse dict, its keys at submit, this job's copy); in memory only
+        with self._lock:
+            self._db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated < ?", (time.time() - ttl,))
+            stale = [k for k, in self._db.execute("SELECT key FROM jobs WHERE status IN ('queued', 'running') AND data IS NOT NULL")]
+        for key in stale:
+            self._update(key, status="queued")
+            self._pool.submit(self._run, key)
+
+    # Returns the job's status. Finished jobs are re-run only if they failed or
+    # reported errors (their successful chunks hit the result cache).
+    def submit(self, key, data, reuse=None):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT status, result FROM jobs WHERE key=?", (key,)).fetchone()
+            if row and (row[0] in ("queued", "running") or (row[0] == "done" and not _unpack(row[1])["errors"])):
+                return row[0]
+            self._db.execute("INSERT OR REPLACE INTO jobs VALUES (?,?,?,?,?,?,?,?,?,?)",
+                             (key, "queued", zlib.compress(data), None, 0, None, None, None, now, now))
+        # The job prunes and fills its own copy, so overlapping jobs from one
+        # session don't prune each other's chunks. When it finishes, the session
+        # drops only the entries this job pruned and gains the ones it added.
+        if reuse is not None:
+            own = dict(reuse)
+            self._reuse[key] = (reuse, set(own), own)
+        self._pool.submit(self._run, key)
+        return "queued"
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT status, total, done, partial, result, error, updated FROM jobs WHERE key=?",
+                                   (key,)).fetchone()
+        if row is None: return None
+        status, total, done, partial, result, error, updated = row
+        return {"status": status, "total": total, "done": done, "partial": _unpack(partial) or [],
+                "result": _unpack(result), "error": error, "updated": updated}
+
+    # Where a job waits: ("worker", jobs queued ahead of it) before it starts,
+    # ("groq", requests from other meetings admitted before its next one) while
+    # its requests wait on the limiter, otherwise None.
+    def position(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT status, created FROM jobs WHERE key=?", (key,)).fetchone()
+            if row and row[0] == "queued":
+                ahead = self._db.execute("SELECT COUNT(*) FROM jobs WHERE status='queued' AND created < ?", (row[1],)).fetchone()[0]
+                return "worker", ahead
+        ahead = self.limiter.position(key) if row and row[0] == "running" else None
+        return ("groq", ahead) if ahead is not None else None
+
+    def _update(self, key, **cols):
+        cols["updated"] = time.time()
+        with self._lock:
+            self._db.execute(f"UPDATE jobs SET {', '.join(c + '=?' for c in cols)} WHERE key=?", (*cols.values(), key))
+
+    def _run(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT data FROM jobs WHERE key=?", (key,)).fetchone()
+        if not row or row[0] is None: return
+        self._update(key, status="running")
+        try:
+            result = self._pipeline(key, zlib.decompress(row[0]))
+        except Exception as e:
+            core.log.exception("job %s failed", key)
+            self._update(key, status="failed", error=str(e) or repr(e), data=None)
+        else:
+            self._update(key, status="done", result=_pack(result), partial=None, data=None)
+            if key in self._reuse:
+                session, before, own = self._reuse[key]
+                for fp in before - set(own): session.pop(fp, None)
+                session.update(own)
+        finally:
+            self._reuse.pop(key, None)
+
+    def _pipeline(self, key, data):
+        with collect(core.DIAGNOSTICS) as stats, tally() as used:
+            segs = core.parse_transcript(io.BytesIO(data))
+            if not segs:
+                raise ValueError("No cues found in file.")
+            duration_min, chs = core.chunk_transcript(segs)
+            self._update(key, total=len(chs))
+            partial, finished, last, routes = {}, set(), [0.0], []
+            def on_progress(i, ts, done):  # streamed topics are written at most twice a second
+                partial[i] = ts
+                if done: finished.add(i)
+                now = time.monotonic()
+                if done or now - last[0] >= 0.5:
+                    last[0] = now
+                    self._update(key, done=len(finished), partial=_pack([t for k in sorted(partial) for t in partial[k]]))
+            reuse = self._reuse[key][2] if key in self._reuse else None
+            topics, errors = asyncio.run(core.extract_topics(chs, limiter=self.limiter, cache=self.cache,
+                                                             on_progress=on_progress, reuse=reuse, tenant=key,
+                                                             routes=routes))
+        return {"duration_min": duration_min, "topics": topics, "errors": errors,
+                "diagnostics": stats and stats.as_dict(), "usage": core.usage_report(chs, used), "routing": routes}
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._db.close()
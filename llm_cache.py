@@ -0,0 +1,55 @@
+import json, time, zlib, sqlite3, hashlib, threading
+from pathlib import Path
+
+# ----- Content-addressed cache of LLM chunk results -----
+# Keyed by a hash of everything that determines the model's answer (model,
+# temperature, system prompt, user prompt), so re-running the same transcript,
+# or any chunk shared with a previous upload, costs no Groq call. Values are
+# zlib-compressed JSON in one SQLite file; entries expire after `ttl` seconds
+# and the least recently used ones are evicted above `max_bytes`.
+
+def cache_key(model, temperature, system, prompt):
+    h = hashlib.sha256()
+    for part in (model, repr(temperature), system, prompt):
+        h.update(part.encode("utf-8")); h.update(b"\0")
+    return h.hexdigest()
+
+class ResultCache:
+    def __init__(self, path, max_bytes=256 << 20, ttl=30*86400):
+        self.path, self.max_bytes, self.ttl = Path(path), max_bytes, ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()  # shared by Streamlit session threads
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,
+            created REAL NOT NULL, accessed REAL NOT NULL)""")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM results WHERE key=?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                return None
+            self._db.execute("UPDATE results SET accessed=? WHERE key=?", (now, key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, value):
+        blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?,?,?,?,?)", (key, blob, len(blob), now, now))
+            self._evict(now)
+
+    def _evict(self, now):
+        self._db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes: return
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed").fetchall():
+            self._db.execute("DELETE FROM results WHERE key=?", (key,))
+            total -= size
+            if total <= self.max_bytes: break
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,179 @@
+import json
+
+# ----- Incremental parsing of the model's {"topics": [...]} answer -----
+# Fed the text deltas of a streamed completion, TopicStream returns each
+# element of the top-level "topics" array as soon as its closing brace
+# arrives, so callers can show topics before the whole answer is in. It scans
+# every character once and only json-decodes complete topic objects.
+
+class TopicStream:
+    def __init__(self):
+        self.text = ""
+        self._pos = 0          # next character to scan
+        self._state = 0        # 0: before the "topics" array, 1: inside it, 2: past it
+        self._depth = 0        # object/array nesting inside that array
+        self._start = None     # start of the topic object being read
+        self._in_str = self._esc = False
+
+    def feed(self, delta):
+        self.text += delta
+        out, text = [], self.text
+        if self._state == 2: return out
+        if self._state == 0:
+            k = text.find('"topics"', self._pos)
+            b = text.find("[", k) if k >= 0 else -1
+            if b < 0: return out
+            self._state, self._pos = 1, b + 1
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self._in_str:
+                if self._esc: self._esc = False
+                elif c == "\\": self._esc = True
+                elif c == '"': self._in_str = False
+                continue
+            if c == '"':
+                self._in_str = True
+            elif c in "{[":
+                if self._depth == 0 and c == "{": self._start = i
+                self._depth += 1
+            elif c in "}]":
+                if self._depth == 0:  # end of the topics array
+                    self._pos, self._state = len(text), 2
+                    return out
+                self._depth -= 1
+                if self._depth == 0 and self._start is not None:
+                    try:
+                        out.append(json.loads(text[self._start:i+1]))
+                    except ValueError:
+                        pass
+                    self._start = None
+        self._pos = len(text)
+        return out
+
+# ----- Validating and salvaging a complete answer -----
+# parse_topics(text) -> (result, outcome): result is {"topics": [...]} with
+# every topic shaped {"title": str, "discussion": [str], "actions": [{"task":
+# str, "owner": str, "due": str|None}]}, or None when nothing usable was found.
+# outcome is "ok" (valid as sent), "coerced" (valid JSON, reshaped: a bare
+# list, a string bullet, a missing owner...), "salvaged" (not valid JSON, e.g.
+# cut off at the token limit or wrapped in prose/code fences: parsed up to the
+# last complete value, open brackets closed) or "failed". A well-formed answer
+# costs one json.loads and a walk of isinstance checks.
+
+_MAX_SALVAGE_TRIES = 8
+
+def _text(v):
+    if v is None: return ""
+    if isinstance(v, str): return v.strip()
+    if isinstance(v, dict): return "; ".join(_text(x) for x in v.values() if _text(x))
+    if isinstance(v, list): return "; ".join(_text(x) for x in v if _text(x))
+    return str(v)
+
+def _get(d, key):  # exact key first, then case-insensitive ("Discussion", "TOPICS")
+    if key in d: return d[key]
+    for k, v in d.items():
+        if isinstance(k, str) and k.strip().lower() == key: return v
+    return None
+
+def _as_list(v):
+    return v if isinstance(v, list) else [] if v is None or v == "" else [v]
+
+def coerce_action(a):  # -> (action or None, changed)
+    if not isinstance(a, dict):
+        task = _text(a)
+        return ({"task": task, "owner": "Unassigned", "due": None} if task else None), True
+    task, owner, due = _text(_get(a, "task")), _text(_get(a, "owner")), _get(a, "due")
+    due = _text(due) if due is not None else None
+    if not due or due.lower() in ("null", "none", "n/a", "-"): due = None
+    out = {"task": task, "owner": owner or "Unassigned", "due": due}
+    changed = a.get("task") != task or a.get("owner") != out["owner"] or a.get("due") != due or len(a) != 3
+    return (out if task else None), changed
+
+def coerce_topic(t):  # -> (topic or None, changed)
+    if not isinstance(t, dict):
+        title = _text(t)
+        return ({"title": title, "discussion": [], "actions": []} if title else None), True
+    title = _text(_get(t, "title"))
+    raw_d, raw_a = _get(t, "discussion"), _get(t, "actions")
+    discussion = [s for s in map(_text, _as_list(raw_d)) if s]
+    actions, changed = [], False
+    for a in _as_list(raw_a):
+        a, c = coerce_action(a)
+        changed |= c
+        if a: actions.append(a)
+    if not (title or discussion or actions): return None, True
+    out = {"title": title or "(untitled)", "discussion": discussion, "actions": actions}
+    changed |= (t.get("title") != out["title"] or t.get("discussion") != discussion
+                or not isinstance(raw_a, list) or len(actions) != len(raw_a) or len(t) != 3)
+    return out, changed
+
+def coerce_topics(obj):  # -> (result or None, changed)
+    if isinstance(obj, dict):
+        topics = _get(obj, "topics")
+        if topics is None and (_get(obj, "title") is not None or _get(obj, "discussion") is not None):
+            topics = [obj]  # a single topic without the wrapper
+        if topics is None: return None, True
+    elif isinstance(obj, list):
+        topics = obj
+    else:
+        return None, True
+    out, changed = [], not isinstance(obj, dict) or "topics" not in obj or len(obj) != 1
+    for t in _as_list(topics):
+        t, c = coerce_topic(t)
+        changed |= c
+        if t: out.append(t)
+    return {"topics": out}, changed or not isinstance(topics, list)
+
+# Cut points where the text so far is a complete prefix: after a closed
+# object/array or before a comma between array elements (cutting between an
+# object's members would keep a half-written action), with the brackets still
+# open there.
+def _cut_points(text):
+    stack, cuts, in_str, esc = [], [], False, False
+    for i, c in enumerate(text):
+        if in_str:
+            if esc: esc = False
+            elif c == "\\": esc = True
+            elif c == '"': in_str = False
+            continue
+        if c == '"': in_str = True
+        elif c in "{[": stack.append("}" if c == "{" else "]")
+        elif c in "}]":
+            if not stack or stack[-1] != c: break
+            stack.pop()
+            cuts.append((i + 1, "".join(reversed(stack))))
+            if not stack: break
+        elif c == "," and stack and stack[-1] == "]":
+            cuts.append((i, "".join(reversed(stack))))
+    return cuts
+
+def salvage_json(text):  # -> the longest parseable prefix of the first {...}/[...] value, or None
+    starts = [k for k in (text.find("{"), text.find("[")) if k >= 0]
+    if not starts: return None
+    text = text[min(starts):]
+    for end, closers in reversed(_cut_points(text)[-_MAX_SALVAGE_TRIES:]):
+        try:
+            return json.loads(text[:end] + closers)
+        except ValueError:
+            continue
+    return None
+
+def parse_topics(text):
+    try:
+        obj, outcome = json.loads(text), "ok"
+    except (TypeError, ValueError):
+        obj, outcome = salvage_json(text or ""), "salvaged"
+    result, changed = coerce_topics(obj)
+    if result is None: return None, "failed"
+    return result, "coerced" if changed and outcome == "ok" else outcome
+
+def build_repair_prompt(text) -> str:
+    return f"""
+The text below was meant to be JSON in this structure but is malformed. Return it
+as valid JSON in exactly this structure, keeping its content; do not add facts.
+
+{{"topics": [{{"title": "string", "discussion": ["string"], "actions": [{{"task": "string", "owner": "string", "due": "string or null"}}]}}]}}
+
+Text:
+{text}
+"""
@@ -0,0 +1,193 @@
+import os, re, bisect, logging, tempfile, threading
+from contextlib import asynccontextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ----- Process-wide Prometheus metrics -----
+# Counters, gauges and histograms shared by every run in the process (all
+# Streamlit sessions, or a whole CLI batch), rendered in the Prometheus text
+# exposition format. serve(port) answers GET /metrics from a daemon thread;
+# write_textfile(path) writes the same text atomically for node_exporter's
+# textfile collector. No client library needed.
+
+log = logging.getLogger("metrics")
+_lock = threading.Lock()
+_write_lock = threading.Lock()  # job threads finish meetings concurrently
+_registry = []
+
+def _esc(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _fmt_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs: return ""
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in pairs) + "}"
+
+def _num(v):
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+class _Metric:
+    kind = ""
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values = {}
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(k, "")) for k in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+    def inc(self, n=1, **labels):
+        k = self._key(labels)
+        with _lock: self.values[k] = self.values.get(k, 0) + n
+
+    def value(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+    def header(self):  # text format 0.0.4 wants HELP/TYPE under the sample name, as prometheus_client writes it
+        return [f"# HELP {self.name}_total {self.help}", f"# TYPE {self.name}_total {self.kind}"]
+
+    def render(self):
+        return self.header() + [f"{self.name}_total{_fmt_labels(self.labels, k)} {_num(v)}" for k, v in sorted(self.values.items())]
+
+class Gauge(_Metric):
+    kind = "gauge"
+    def __init__(self, name, help, labels=(), func=None):
+        super().__init__(name, help, labels)
+        self.func = func  # computed at render time when given
+
+    def inc(self, n=1, **labels):
+        k = self._key(labels)
+        with _lock: self.values[k] = self.values.get(k, 0) + n
+
+    def dec(self, n=1, **labels):
+        self.inc(-n, **labels)
+
+    def render(self):
+        values = {(): self.func()} if self.func else self.values
+        return self.header() + [f"{self.name}{_fmt_labels(self.labels, k)} {_num(v)}" for k, v in sorted(values.items())]
+
+class Histogram(_Metric):
+    kind = "histogram"
+    def __init__(self, name, help, labels=(), buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, v, **labels):
+        k = self._key(labels)
+        with _lock:
+            counts, total = self.values.get(k) or ([0]*(len(self.buckets)+1), 0.0)
+            counts[bisect.bisect_left(self.buckets, v)] += 1
+            self.values[k] = (counts, total + v)
+
+    def render(self):
+        out = self.header()
+        for k, (counts, total) in sorted(self.values.items()):
+            cum = 0
+            for le, c in zip(self.buckets + ("+Inf",), counts):
+                cum += c
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, k, [('le', le if le == '+Inf' else _num(le))])} {cum}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, k)} {_num(round(total, 6))}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, k)} {cum}")
+        return out
+
+def render():
+    with _lock:
+        return "\n".join(line for m in _registry for line in m.render()) + "\n"
+
+# ----- Pipeline metrics -----
+GROQ_LATENCY = Histogram("mom_groq_request_seconds", "Groq chat completion latency by HTTP status and model.", ["status", "model"])
+GROQ_IN_FLIGHT = Gauge("mom_groq_in_flight", "Groq requests currently being sent.")
+GROQ_QUEUED = Gauge("mom_groq_queued", "Groq requests waiting for a rate limiter slot.")
+GROQ_RETRIES = Counter("mom_groq_retries", "Groq requests retried after a retryable failure.")
+TOKENS = Counter("mom_groq_tokens", "Tokens reported in Groq usage.", ["kind"])
+LLM_JSON = Counter("mom_llm_answers", "Model answers by how they parsed: ok, coerced, salvaged, repaired or failed.", ["outcome"])
+CACHE = Counter("mom_llm_cache_lookups", "LLM result cache lookups.", ["result"])
+CACHE_HIT_RATIO = Gauge("mom_llm_cache_hit_ratio", "Share of LLM result cache lookups that hit.",
+                        func=lambda: CACHE.value(result="hit") / max(1, CACHE.value(result="hit") + CACHE.value(result="miss")))
+MEETING_CHUNKS = Histogram("mom_meeting_chunks", "Chunks sent per meeting.", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+MEETINGS = Counter("mom_meetings", "Meetings summarized, by outcome.", ["outcome"])
+ERRORS = Counter("mom_errors", "Errors reported in minutes, by kind.", ["kind"])
+
+_STATUSES = {"200", "400", "401", "403", "404", "408", "409", "413", "422", "425", "429", "500", "502", "503", "504"}
+
+def status_label(status):
+    s = str(status)
+    return s if s in _STATUSES else "network" if status is None else f"{s[0]}xx"
+
+# Maps the error strings mom_core puts in `errors` to a bounded label set.
+_HTTP_RE = re.compile(r"^HTTP (\d{3})")
+
+def error_kind(err):
+    err = str(err)
+    m = _HTTP_RE.match(err)
+    if m:
+        code = int(m.group(1))
+        if code == 429: return "rate_limited"
+        if code in (401, 403): return "auth"
+        if code == 413 or (code == 400 and "context" in err.lower()): return "context_length"  # as mom_core._overflow
+        return "server_error" if code >= 500 else "client_error"
+    if err.startswith("Network error"): return "network"
+    if err.startswith("Parse error"): return "parse"
+    if "GROQ_API_KEY" in err: return "config"
+    return "other"
+
+@asynccontextmanager
+async def tracked(slot):
+    # Counts a request as queued until `slot` (the limiter) admits it, then in flight.
+    GROQ_QUEUED.inc()
+    admitted = False
+    try:
+        async with slot:
+            GROQ_QUEUED.dec(); admitted = True
+            GROQ_IN_FLIGHT.inc()
+            try:
+                yield
+            finally:
+                GROQ_IN_FLIGHT.dec()
+    finally:
+        if not admitted: GROQ_QUEUED.dec()
+
+def record_meeting(chunks, topics, errors):
+    MEETING_CHUNKS.observe(chunks)
+    MEETINGS.inc(outcome="ok" if not errors else "partial" if topics else "failed")
+    for e in errors:
+        ERRORS.inc(kind=error_kind(e))
+
+# ----- Exposition -----
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404); return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *a):
+        pass
+
+def serve(port, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+# Never raises: a failed export is logged and must not fail the meeting.
+def write_textfile(path):
+    tmp = None
+    try:
+        with _write_lock:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(path) or ".",
+                                             prefix=os.path.basename(path) + ".", suffix=".tmp", delete=False) as f:
+                tmp = f.name
+                f.write(render())
+            os.chmod(tmp, 0o644)  # mkstemp's 0600 would hide it from node_exporter
+            os.replace(tmp, path)
+    except OSError:
+        log.warning("could not write metrics to %s", path, exc_info=True)
+        if tmp and os.path.exists(tmp): os.remove(tmp)
@@ -0,0 +1,570 @@
+import os, copy, json, time, asyncio, logging, httpx
+from contextlib import nullcontext
+from transcript import SegmentTable, merge_short, chunk_by_tokens, trim_chunk, fmt_chunk
+import ratelimit
+from ratelimit import RateLimiter, estimate_tokens, parse_duration
+from retry import RetryPolicy, RETRY_STATUSES
+from llm_cache import ResultCache, cache_key
+from consolidate import consolidate_local, consolidate_llm
+from dedupe import dedupe_topics
+from llm_json import TopicStream, parse_topics, coerce_topic, build_repair_prompt
+from diagnostics import stage, count, timed
+import metrics, usage
+
+# Minutes-of-meeting pipeline shared by the Streamlit app and the mom_generate
+# CLI. Nothing here imports Streamlit.
+
+# ----- Settings -----
+# Read from the environment at import; the app calls configure(st.secrets), whose
+# entries take precedence over environment variables of the same name.
+# Required:
+#   GROQ_API_KEY = "your_groq_api_key"
+# Optional:
+#   GROQ_MODEL   = "llama-3.1-8b-instant" (default below)
+#   GROQ_LARGE_MODEL = "" (model for chunks of ROUTE_LARGE_TOKENS = 6000 prompt tokens or
+#                  more, or that don't fit GROQ_MODEL's context)
+#   GROQ_FALLBACK_MODELS = "" (comma-separated; tried in order when a model answers
+#                  429/503 or rejects the prompt as too long)
+#   GROQ_BASE_URL = "https://api.groq.com/openai/v1" (any OpenAI-compatible endpoint,
+#                  e.g. bench/mock_groq.py)
+#   DEBUG        = "true" to print raw exceptions
+#   GROQ_MAX_CONNECTIONS = 20 (HTTP connection pool size per extraction run)
+#   GROQ_HTTP2   = "false" to force HTTP/1.1
+#   GROQ_STREAM  = "true" to stream completions (topics show up while a chunk is
+#                  still generating; JSON mode is not available when streaming)
+#   GROQ_CONCURRENCY = 4, GROQ_RPM = 30, GROQ_TPM = 6000 (starting pace; refined from
+#                  the x-ratelimit-* response headers during a run)
+#   GROQ_MAX_ATTEMPTS = 4, GROQ_RETRY_BUDGET = 20 (per-call attempts / retries per run)
+#   LLM_CACHE_PATH = ".cache/llm_results.sqlite" ("" disables the result cache)
+#   LLM_CACHE_MB = 256, LLM_CACHE_TTL_DAYS = 30
+#   CHUNK_TOKENS = 3000 (prompt tokens per request, capped by the model's context)
+#   CHUNK_SPLIT_DEPTH = 3 (times a chunk every model rejects as too long is halved
+#                  and retried; 0 disables)
+#   MEETING_TOKEN_CEILING = 0 (estimated prompt + completion tokens allowed per meeting;
+#                  above it chunks are made coarser, then their shortest lines dropped)
+#   REDUCE_MODE  = "local" (merge similar topics across chunks), "llm" (then also
+#                  fan topics into the model, REDUCE_FAN_IN = 8 per call, at most
+#                  REDUCE_MAX_DEPTH = 2 levels) or "off"
+#   DEDUPE_THRESHOLD = 0.7 (word-set Jaccard above which bullets/actions collapse; 0 disables)
+#   DIAGNOSTICS  = "false" to skip per-stage timings and counters (see diagnostics.py)
+#   JOBS_PATH    = ".cache/jobs.sqlite", JOB_WORKERS = 8, JOB_TTL_DAYS = 7 (the app's
+#                  background extraction jobs, see jobs.py; all jobs share one rate
+#                  limiter, so GROQ_CONCURRENCY caps Groq requests for the whole server)
+#   METRICS_PORT = 0 (the app serves Prometheus metrics on this port when set, see metrics.py)
+#   METRICS_TEXTFILE = "" (rewrite this .prom file after every meeting, for node_exporter)
+def _flag(v):
+    return str(v or "false").lower() == "true"
+
+_SETTINGS = {
+    "GROQ_API_KEY": (None, lambda v: v),
+    "GROQ_MODEL": ("llama-3.1-8b-instant", str),
+    "GROQ_LARGE_MODEL": ("", str),
+    "ROUTE_LARGE_TOKENS": (6000, int),
+    "GROQ_FALLBACK_MODELS": ("", lambda v: [m.strip() for m in str(v).split(",") if m.strip()]),
+    "GROQ_BASE_URL": ("https://api.groq.com/openai/v1", str),
+    "DEBUG": ("false", _flag),
+    "GROQ_MAX_CONNECTIONS": (20, int),
+    "GROQ_HTTP2": ("true", _flag),
+    "GROQ_STREAM": ("false", _flag),
+    "GROQ_CONCURRENCY": (4, int),
+    "GROQ_RPM": (30, int),
+    "GROQ_TPM": (6000, int),
+    "GROQ_MAX_ATTEMPTS": (4, int),
+    "GROQ_RETRY_BUDGET": (20, int),
+    "LLM_CACHE_PATH": (".cache/llm_results.sqlite", str),
+    "LLM_CACHE_MB": (256, int),
+    "LLM_CACHE_TTL_DAYS": (30, float),
+    "CHUNK_TOKENS": (3000, int),
+    "CHUNK_SPLIT_DEPTH": (3, int),
+    "MEETING_TOKEN_CEILING": (0, int),
+    "REDUCE_MODE": ("local", str),
+    "REDUCE_FAN_IN": (8, int),
+    "REDUCE_MAX_DEPTH": (2, int),
+    "DEDUPE_THRESHOLD": (0.7, float),
+    "DIAGNOSTICS": ("true", _flag),
+    "JOBS_PATH": (".cache/jobs.sqlite", str),
+    "JOB_WORKERS": (8, int),
+    "JOB_TTL_DAYS": (7, float),
+    "METRICS_PORT": (0, int),
+    "METRICS_TEXTFILE": ("", str),
+}
+
+def configure(source=os.environ):
+    for name, (default, conv) in _SETTINGS.items():
+        globals()[name] = conv(source.get(name, os.environ.get(name, default)))
+
+configure()
+
+log = logging.getLogger("mom_core")
+on_exception = None  # the app points this at st.exception
+
+def _debug_exception(e):
+    if DEBUG: (on_exception or log.exception)(e)
+
+SYSTEM_PROMPT = "Return ONLY valid JSON."
+TEMPERATURE  = 0.2
+
+# ----- Transcript stages -----
+def parse_transcript(stream):
+    with stage("parse"):
+        table = SegmentTable.from_vtt(stream)
+    with stage("merge"):
+        segs = merge_short(table)
+    count("cues", len(table)); count("segments", len(segs))
+    return segs
+
+# Context windows of the Groq models we route to; unknown models get a safe default.
+MODEL_CONTEXT = {
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "mixtral-8x7b-32768": 32768,
+    "gemma2-9b-it": 8192,
+}
+COMPLETION_TOKENS = 1024  # reserved for the JSON answer
+
+def _context(model):
+    return MODEL_CONTEXT.get(model, 8192)
+
+def _max_context():  # chunks may be as large as the largest routed model allows
+    return max(_context(m) for m in [GROQ_MODEL, GROQ_LARGE_MODEL] if m)
+
+def chunk_budget(model=None):  # -> (budget, overhead) in prompt tokens
+    overhead = estimate_tokens(SYSTEM_PROMPT + build_prompt(""), completion=0)
+    ctx = _context(model) if model else _max_context()
+    return min(CHUNK_TOKENS, ctx - COMPLETION_TOKENS), overhead
+
+def chunk_transcript(segs, budget=None, overlap=20, ceiling=None):  # -> (duration_min, chunks)
+    duration_min = int(round((segs.end_ms[-1] - segs.start_ms[0])/60000))
+    default_budget, overhead = chunk_budget()
+    ceiling = MEETING_TOKEN_CEILING if ceiling is None else ceiling
+    with stage("chunk"):
+        chs = chunk_by_tokens(segs, budget or default_budget, overhead, overlap)
+        if ceiling: chs = fit_ceiling(segs, chs, budget or default_budget, overhead, ceiling)
+    count("chunks", len(chs))
+    return duration_min, chs
+
+def prompt_tokens(chunks):  # estimated prompt tokens of each chunk's request
+    return [estimate_tokens(SYSTEM_PROMPT + build_prompt(fmt_chunk(c)), completion=0) for c in chunks]
+
+def meeting_tokens(chunks):
+    return sum(prompt_tokens(chunks)) + COMPLETION_TOKENS*len(chunks)
+
+# Keeps a meeting's estimated tokens under `ceiling`: first fewer, larger chunks
+# without overlap (less repeated instructions, completion reserve and overlap),
+# up to the model's context and the per-minute token limit (Groq rejects a
+# larger request outright, 413); then each chunk's shortest lines are dropped
+# proportionally.
+def fit_ceiling(segs, chs, budget, overhead, ceiling):
+    cap = min(_max_context(), GROQ_TPM) - COMPLETION_TOKENS
+    total = meeting_tokens(chs)
+    while total > ceiling and budget < cap:
+        budget = min(cap, budget*2)
+        chs = chunk_by_tokens(segs, budget, overhead, overlap=0)
+        total = meeting_tokens(chs)
+    if total > ceiling:
+        text = [t - overhead for t in prompt_tokens(chs)]
+        keep = max(0.0, 1 - (total - ceiling)/max(1, sum(text)))
+        chs = [trim_chunk(c, keep*t) for c, t in zip(chs, text)]
+        count("trimmed_segments", sum(c["trimmed"] for c in chs))
+        chs = [c for c in chs if len(c["items"])]
+        log.warning("meeting over MEETING_TOKEN_CEILING=%d; kept %.0f%% of the transcript", ceiling, keep*100)
+    return chs
+
+def estimate_usage(chunks, models=None):  # pre-flight, one row per model
+    tokens = prompt_tokens(chunks)
+    return [usage.estimate(m, tokens, COMPLETION_TOKENS, _context(m))
+            for m in models or dict.fromkeys([GROQ_MODEL, *MODEL_CONTEXT])]
+
+def usage_report(chunks, used):  # -> {"estimate": ..., "actual": ...}; estimate for GROQ_MODEL, used from usage.tally()
+    return {"estimate": estimate_usage(chunks, [GROQ_MODEL])[0], "actual": usage.actual(used)}
+
+# ----- Prompt (detailed discussion + crisp actions) -----
+def build_prompt(chunk_text: str) -> str:
+    return f"""
+You are a professional business meeting summarizer.
+
+Your goal is to generate structured minutes of meeting in detailed yet clear form.
+
+Return JSON in this structure:
+{{
+  "topics": [
+    {{
+      "title": "string",
+      "discussion": [
+        "Detailed bullet capturing what was said, the reasoning, decisions, and relevant context."
+      ],
+      "actions": [
+        {{"task": "short imperative action <= 20 words", "owner": "person/team or Unassigned", "due": "date if given or null"}}
+      ]
+    }}
+  ]
+}}
+
+Guidelines:
+- Discussion bullets should be rich and explanatory (who said what, why, context, decisions).
+- Actions must be crisp, imperative, and omit rationale (keep rationale in discussion).
+- Only include owners/dates when explicitly stated; otherwise owner="Unassigned", due=null.
+- Do not invent facts.
+
+Transcript:
+{chunk_text}
+"""
+
+# ----- Groq call with robust error reporting -----
+def _groq_error_text(resp_json: dict) -> str:
+    if resp_json is None:
+        return "Unknown error (no response body)."
+    try:
+        # OpenAI-compatible error shape
+        err = resp_json.get("error")
+        if err:
+            code = f" ({err['code']})" if err.get("code") else ""
+            return f"{err.get('type','error').upper()}: {err.get('message','')}{code}"
+    except Exception:
+        pass
+    # Fallback raw
+    try:
+        return json.dumps(resp_json)[:500]
+    except Exception:
+        return "Unspecified Groq error."
+
+# One pooled client per extraction run: chunks share keep-alive (and, when the
+# h2 package is installed, multiplexed HTTP/2) connections instead of each
+# paying its own TCP+TLS handshake. A client is bound to the event loop it was
+# opened on, so it is not reused across asyncio.run() calls.
+def make_groq_client(max_connections=None, http2=None):
+    max_connections = max_connections or GROQ_MAX_CONNECTIONS
+    if http2 is None: http2 = GROQ_HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401  (httpx[http2] extra)
+        except ImportError:
+            http2 = False
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections, keepalive_expiry=30)
+    return httpx.AsyncClient(timeout=120, limits=limits, http2=http2)
+
+def make_rate_limiter():
+    return RateLimiter(concurrency=GROQ_CONCURRENCY, rpm=GROQ_RPM, tpm=GROQ_TPM)
+
+def make_retry_policy():
+    return RetryPolicy(max_attempts=GROQ_MAX_ATTEMPTS, budget=GROQ_RETRY_BUDGET)
+
+def make_llm_cache():
+    if not LLM_CACHE_PATH: return None
+    return ResultCache(LLM_CACHE_PATH, max_bytes=LLM_CACHE_MB << 20, ttl=LLM_CACHE_TTL_DAYS*86400)
+
+# ----- Model routing -----
+# Small prompts go to GROQ_MODEL (fast); prompts of ROUTE_LARGE_TOKENS or more,
+# or too long for it, go to GROQ_LARGE_MODEL. The rest of the chain, tried when
+# a model is overloaded (429/503) or rejects the prompt's length, is the other
+# of those two and then GROQ_FALLBACK_MODELS; models whose context can't hold
+# the prompt are skipped.
+def route_models(prompt_tokens):
+    fits = lambda m: prompt_tokens + COMPLETION_TOKENS <= _context(m)
+    large = GROQ_LARGE_MODEL and (prompt_tokens >= ROUTE_LARGE_TOKENS or not fits(GROQ_MODEL))
+    chain = [GROQ_LARGE_MODEL, GROQ_MODEL] if large else [GROQ_MODEL, GROQ_LARGE_MODEL]
+    chain = [m for m in dict.fromkeys(chain + GROQ_FALLBACK_MODELS) if m]
+    return [m for m in chain if fits(m)] or chain[:1]
+
+# `trace`, when given, is filled with the routing outcome: the model that
+# answered, whether it came from the cache, every attempt as [model, outcome],
+# the call's wall time, on failure whether the last model rejected the prompt
+# as too long ("overflow"), and for an answer salvaged from broken JSON or
+# repaired by a second request how it was recovered ("recovered"). Those may
+# be partial, so they are not cached.
+async def call_groq(prompt: str, client=None, limiter=None, retry=None, cache=None, on_topic=None, trace=None):
+    trace = {} if trace is None else trace
+    t0 = time.perf_counter()
+    models = route_models(estimate_tokens(SYSTEM_PROMPT + prompt, completion=0))
+    trace.update(model=None, cached=False, attempts=[], seconds=0.0)
+    keys = {m: cache_key(m, TEMPERATURE, SYSTEM_PROMPT, prompt) for m in models} if cache else {}
+    for m, key in keys.items():
+        hit = cache.get(key)
+        if hit is not None: break
+    if keys:
+        metrics.CACHE.inc(result="miss" if hit is None else "hit")
+        if hit is not None:
+            count("cache_hits"); usage.record("cache_hits")
+            trace.update(model=m, cached=True)
+            return hit, None
+    if not GROQ_API_KEY:
+        return None, "GROQ_API_KEY is missing (Streamlit Secrets or environment)."
+    async with (nullcontext(client) if client else make_groq_client()) as client:
+        attempt, k = 0, 0
+        while True:
+            attempt += 1
+            model = models[k]
+            result, err, retryable, retry_after, kind = await _groq_attempt(prompt, client, limiter, on_topic, model)
+            trace["attempts"].append([model, "ok" if err is None else err.split(":")[0]])
+            trace["seconds"] = round(time.perf_counter() - t0, 3)
+            if err is None:
+                trace["model"] = model
+                if kind: trace["recovered"] = kind
+                if keys and not kind: cache.put(keys[model], result)  # a possibly partial answer isn't replayed
+                return result, None
+            if kind and k + 1 < len(models):  # next model right away, no backoff
+                k += 1
+                count("fallbacks")
+                continue
+            if not (retryable and retry and retry.allow(attempt)):
+                trace["overflow"] = kind == "overflow"
+                return None, err if attempt == 1 else f"{err} (after {attempt} attempts)"
+            count("retries"); metrics.GROQ_RETRIES.inc()
+            await asyncio.sleep(retry.delay(attempt, retry_after))
+
+_OVERFLOW_HINTS = ("context_length", "context length", "maximum context", "reduce the length", "too large")
+
+def _overflow(status, body):  # the prompt doesn't fit the model (context or per-request token limit)
+    return status in (400, 413) and any(h in _groq_error_text(body).lower() for h in _OVERFLOW_HINTS)
+
+# One request; returns (result, error, retryable, retry_after_seconds, kind),
+# where kind is "overloaded" (429/503), "overflow" (prompt too long) or None on
+# failure, and "salvaged" or "repaired" (possibly partial) or None on success.
+# Answers are validated and, when malformed or cut off, salvaged locally (see
+# llm_json.parse_topics); only an answer with nothing usable in it is sent back
+# once with a short repair prompt (the answer alone, not the transcript).
+async def _groq_attempt(prompt, client, limiter, on_topic=None, model=None, repair=True):
+    model = model or GROQ_MODEL
+    payload = {
+        "model": model,
+        "response_format": {"type": "json_object"},
+        "messages": [
+            {"role":"system","content":SYSTEM_PROMPT},
+            {"role":"user","content": prompt}
+        ],
+        "temperature": TEMPERATURE
+    }
+    if GROQ_STREAM:
+        # Groq's JSON mode can't be combined with streaming; the system prompt
+        # still asks for JSON only.
+        del payload["response_format"]
+        payload["stream"] = True
+    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
+    url = GROQ_BASE_URL.rstrip("/") + "/chat/completions"
+    est = estimate_tokens(prompt, COMPLETION_TOKENS)
+    status = None
+    try:
+        async with metrics.tracked(limiter.slot(est) if limiter else nullcontext()):
+            post = _post_stream if GROQ_STREAM else _post
+            count("requests"); count("prompt_chars", len(prompt)); usage.record("requests")
+            t0 = time.perf_counter()
+            try:
+                with stage("groq"):
+                    status, resp_headers, body, content, used = await post(client, url, headers, payload, on_topic)
+            finally:
+                metrics.GROQ_LATENCY.observe(time.perf_counter() - t0, status=metrics.status_label(status), model=model)
+    except Exception as e:
+        _debug_exception(e)
+        return None, f"Network error calling Groq: {repr(e)}", isinstance(e, httpx.TransportError), None, None
+    used = used or {}
+    for k in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        count(k, used.get(k) or 0)
+    for k in ("prompt_tokens", "completion_tokens"):
+        usage.record(k, used.get(k) or 0); usage.record(f"{model}/{k}", used.get(k) or 0)
+    for k in ("prompt", "completion"):
+        if used.get(f"{k}_tokens"): metrics.TOKENS.inc(used[f"{k}_tokens"], kind=k)
+    if limiter:
+        limiter.observe(status, resp_headers, used.get("total_tokens"), est)
+    if status >= 400:
+        retryable = status in RETRY_STATUSES
+        kind = "overloaded" if status in (429, 503) else "overflow" if _overflow(status, body) else None
+        return (None, f"HTTP {status}: {_groq_error_text(body)}", retryable,
+                parse_duration(resp_headers.get("retry-after")), kind)
+    with stage("validate"):
+        result, outcome = parse_topics(content)
+    count(f"json_{outcome}"); metrics.LLM_JSON.inc(outcome=outcome)
+    if result is not None:
+        return result, None, False, None, "salvaged" if outcome == "salvaged" else None
+    if repair and content and content.strip():
+        result, err, _, _, _ = await _groq_attempt(build_repair_prompt(content), client, limiter, None, model, False)
+        if err is None:
+            count("json_repaired"); metrics.LLM_JSON.inc(outcome="repaired")
+            return result, None, False, None, "repaired"
+    if DEBUG: log.warning("Unparseable model answer: %r", (content or "")[:500])
+    return None, f"Parse error: no topics JSON in the answer ({len(content or '')} chars; model returned non-JSON?)", True, None, None
+
+def _json_or_none(r):
+    try:
+        return r.json()
+    except Exception:
+        return None
+
+# Both return (status, headers, error_body, content, usage).
+async def _post(client, url, headers, payload, on_topic=None):
+    r = await client.post(url, headers=headers, json=payload)
+    body = _json_or_none(r)
+    if r.status_code >= 400:
+        return r.status_code, r.headers, body, None, None
+    try:
+        content = body["choices"][0]["message"]["content"]
+    except Exception:
+        content = None
+    usage = body.get("usage") if isinstance(body, dict) else None
+    return r.status_code, r.headers, None, content, usage
+
+# Server-sent events: "data: {chunk}" lines ending with "data: [DONE]". Topics
+# are handed to on_topic as soon as each one's JSON object is complete.
+async def _post_stream(client, url, headers, payload, on_topic=None):
+    async with client.stream("POST", url, headers=headers, json=payload) as r:
+        if r.status_code >= 400:
+            await r.aread()
+            return r.status_code, r.headers, _json_or_none(r), None, None
+        parts, usage, topics = [], None, TopicStream()
+        async for line in r.aiter_lines():
+            if not line.startswith("data:"): continue
+            data = line[5:].strip()
+            if data == "[DONE]": break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            usage = event.get("usage") or (event.get("x_groq") or {}).get("usage") or usage
+            for choice in event.get("choices") or []:
+                delta = (choice.get("delta") or {}).get("content")
+                if not delta: continue
+                parts.append(delta)
+                for t in topics.feed(delta):
+                    t, _ = coerce_topic(t)
+                    if t and on_topic: on_topic(t)
+        return r.status_code, r.headers, None, "".join(parts), usage
+
+# ----- Extraction orchestration (collects errors) -----
+# on_progress(index, topics, done) is called with a chunk's topics so far as they
+# stream in (done=False) and once more when the chunk completes (done=True).
+# Chunks finish in any order; `index` is the chunk's position in `chunks`.
+#
+# `reuse` (a dict the caller keeps between runs, e.g. per session) maps chunk
+# fingerprints to their extracted topics. A re-uploaded transcript with a fixed
+# cue or a few appended minutes mostly re-chunks to the same chunk texts, so
+# only chunks whose fingerprint changed are sent; consolidation then runs over
+# reused and new results alike. Afterwards `reuse` holds exactly this run's
+# successful chunks. Unlike the LLM result cache it works when that is off.
+# Runs in flight at the same time need their own dicts (jobs.py gives each job
+# a copy of the session's).
+def chunk_fingerprint(prompt):
+    models = route_models(estimate_tokens(SYSTEM_PROMPT + prompt, completion=0))
+    return cache_key(",".join(models), TEMPERATURE, SYSTEM_PROMPT, prompt)
+
+#
+# A chunk that every routed model rejects as too long is split in half by its
+# items and the halves sent instead, recursively up to CHUNK_SPLIT_DEPTH; their
+# topics come back as that chunk's result (and its routing record lists the
+# halves under "split"), so an oversized window costs a few extra requests
+# rather than its part of the minutes.
+#
+# `tenant` names the meeting for a limiter shared between runs (see ratelimit);
+# by default every call is a tenant of its own. `routes`, when given, receives
+# one routing record per chunk (see call_groq), in chunk order.
+async def extract_topics(chunks, client=None, limiter=None, retry=None, cache=None, on_progress=None, reuse=None,
+                         tenant=None, routes=None):
+    if client is None:
+        async with make_groq_client() as client:
+            return await extract_topics(chunks, client, limiter, retry, cache, on_progress, reuse, tenant, routes)
+    limiter = limiter or make_rate_limiter()
+    retry = retry or make_retry_policy()
+    topics, errors, fps = [], [], set()
+    async def run(i, c):
+        with stage("prompt"):
+            prompt = build_prompt(fmt_chunk(c))
+        fp = chunk_fingerprint(prompt)
+        fps.add(fp)
+        traces[i] = {"chunk": i, "prompt_tokens": estimate_tokens(SYSTEM_PROMPT + prompt, completion=0)}
+        hit = reuse.get(fp) if reuse is not None else None
+        if hit is not None:
+            count("chunks_reused")
+            traces[i]["reused"] = True
+            result = copy.deepcopy(hit)  # the reduce stage edits topics in place
+            if on_progress: on_progress(i, result.get("topics", []), True)
+            return result
+        seen = []
+        def on_topic(t):
+            seen.append(t)
+            on_progress(i, list(seen), False)
+        result, errs = await send(c, prompt, traces[i], on_topic if on_progress else None)
+        errors.extend(errs)
+        if not errs and reuse is not None and not traces[i].get("recovered"): reuse[fp] = copy.deepcopy(result)
+        result = result or {"topics": []}
+        if on_progress: on_progress(i, result.get("topics", []), True)
+        return result
+    async def send(c, prompt, trace, on_topic, depth=0):  # -> (result, errors)
+        result, err = await call_groq(prompt, client, limiter, retry, cache, on_topic, trace)
+        items = c["items"]
+        if not (err and trace.get("overflow") and depth < CHUNK_SPLIT_DEPTH and len(items) > 1):
+            return result, [err] if err else []
+        count("chunk_splits")
+        halves = [{**c, "items": items[:len(items)//2]}, {**c, "items": items[len(items)//2:]}]
+        prompts = [build_prompt(fmt_chunk(h)) for h in halves]
+        trace["split"] = [{"prompt_tokens": estimate_tokens(SYSTEM_PROMPT + p, completion=0)} for p in prompts]
+        parts = await asyncio.gather(*[send(h, p, t, on_topic, depth + 1)
+                                       for h, p, t in zip(halves, prompts, trace["split"])])
+        return ({"topics": [t for r, _ in parts for t in (r or {}).get("topics", [])]},
+                [e for _, errs in parts for e in errs])
+    traces = [None]*len(chunks)
+    token = ratelimit.tenant.set((tenant or object(), len(chunks)))
+    try:
+        with stage("extract"):
+            results = await asyncio.gather(*[run(i, c) for i, c in enumerate(chunks)])
+        if reuse is not None:
+            for fp in set(reuse) - fps: del reuse[fp]
+        if routes is not None: routes.extend(traces)
+        for r in results:
+            topics.extend(r.get("topics", []))
+        topics, errors = await reduce_topics(topics, errors, lambda p: call_groq(p, client, limiter, retry, cache))
+    finally:
+        ratelimit.tenant.reset(token)
+    metrics.record_meeting(len(chunks), topics, errors)
+    if METRICS_TEXTFILE: metrics.write_textfile(METRICS_TEXTFILE)
+    return topics, errors
+
+@timed("reduce")
+async def reduce_topics(topics, errors, call):
+    if not topics:
+        return topics, errors
+    if REDUCE_MODE != "off":
+        topics = consolidate_local(topics)
+    if REDUCE_MODE == "llm":
+        topics = await consolidate_llm(topics, call, REDUCE_FAN_IN, REDUCE_MAX_DEPTH)
+    if DEDUPE_THRESHOLD > 0:
+        topics = dedupe_topics(topics, DEDUPE_THRESHOLD)
+    return topics, errors
+
+# ----- Rendering -----
+@timed("render")
+def render_email_draft(meeting_title, topics, errors):
+    lines = [
+        f"Subject: Minutes of Meeting – {meeting_title}",
+        "",
+        "Please find the meeting minutes below:",
+        "",
+        "**Key Discussion Points, Actions & Decisions -**",
+        ""
+    ]
+    if topics:
+        for t in topics:
+            lines.append(f"**{t.get('title','(untitled)')}**")
+            for d in t.get("discussion", []):
+                lines.append(f"*   {d}")
+            for a in t.get("actions", []):
+                task=a.get("task",""); own=a.get("owner","Unassigned"); due=a.get("due") or "-"
+                lines.append(f"*   **[Action] {task} — Owner: {own}, Due: {due}.**")
+            lines.append("")
+    else:
+        reason = errors[0] if errors else "No extractable content detected or input too large."
+        lines.append(f"_Note: No topics could be extracted. Reason: {reason}_")
+        lines.append("")
+
+    draft = "\n".join(lines + ["Regards,", "Automated MoM Assistant"])
+    return draft
+
+def minutes_payload(meeting_title, duration_min, topics, draft, errors, diagnostics=None, usage=None, routing=None):
+    payload = {
+        "meeting_title": meeting_title,
+        "duration_min": duration_min,
+        "topics": topics,
+        "email_draft": draft,
+        "errors": errors
+    }
+    if usage: payload["usage"] = usage
+    if routing: payload["routing"] = routing
+    if diagnostics: payload["diagnostics"] = diagnostics
+    return payload
@@ -0,0 +1,102 @@
+import os, sys, glob, asyncio, argparse, json
+from pathlib import Path
+import mom_core as core
+from diagnostics import collect
+from usage import tally
+
+# ----- Headless batch entry point -----
+# Summarizes .vtt transcripts without Streamlit and writes one minutes.json per
+# input. Settings come from the environment (see mom_core). One HTTP client and
+# one rate limiter are shared by every file, so Groq concurrency and pacing are
+# global across the batch; --jobs only bounds how many transcripts are held in
+# memory at once.
+#   GROQ_API_KEY=... python mom_generate.py recordings/ "archive/2024-*/*.vtt" -o out/
+
+def find_inputs(specs):
+    out = []
+    for spec in specs:
+        p = Path(spec)
+        if p.is_dir():
+            out.extend(sorted(f for f in p.rglob("*.vtt") if f.is_file()))
+        elif p.is_file():
+            out.append(p)
+        else:
+            out.extend(Path(m) for m in sorted(glob.glob(spec, recursive=True)) if m.endswith(".vtt") and Path(m).is_file())
+    return list(dict.fromkeys(out))  # de-dup, keep order
+
+# With --out-dir the inputs' folders are mirrored below it, relative to the
+# deepest folder they all share, so a/standup.vtt and b/standup.vtt don't
+# write the same file.
+def input_root(files):
+    return Path(os.path.commonpath([f.resolve().parent for f in files]))
+
+def output_path(src, out_dir, root=None):
+    name = f"{src.stem}.minutes.json"
+    if not out_dir: return src.with_name(name)
+    rel = src.resolve().parent.relative_to(root) if root else Path()
+    return Path(out_dir) / rel / name
+
+async def summarize_file(src, dst, title, client, limiter, cache):
+    with collect(core.DIAGNOSTICS) as stats, tally() as used:  # each file runs in its own task, so both stay per file
+        with open(src, "rb") as f:
+            segs = core.parse_transcript(f)
+        if not segs:
+            return src, "No cues found in file."
+        duration_min, chs = core.chunk_transcript(segs)
+        routes = []
+        topics, errors = await core.extract_topics(chs, client, limiter, core.make_retry_policy(), cache, routes=routes)
+        draft = core.render_email_draft(title or src.stem, topics, errors)
+    payload = core.minutes_payload(title or src.stem, duration_min, topics, draft, errors,
+                                   stats and stats.as_dict(), core.usage_report(chs, used), routes)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    dst.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return src, errors[0] if errors and not topics else None
+
+async def run(files, out_dir, title, jobs, skip_existing):
+    cache = core.make_llm_cache()
+    limiter = core.make_rate_limiter()
+    gate = asyncio.Semaphore(jobs)
+    root = input_root(files)
+    async with core.make_groq_client() as client:
+        async def one(src):
+            dst = output_path(src, out_dir, root)
+            if skip_existing and dst.exists():
+                return src, None
+            async with gate:
+                try:
+                    return await summarize_file(src, dst, title, client, limiter, cache)
+                except Exception as e:  # one bad input must not cancel the rest of the batch
+                    core.log.debug("%s failed", src, exc_info=True)
+                    return src, str(e) or repr(e)
+        failed = 0
+        for fut in asyncio.as_completed([one(f) for f in files]):
+            src, err = await fut
+            failed += bool(err)
+            print(f"{'FAIL' if err else 'ok  '} {src}" + (f": {err}" if err else ""), file=sys.stderr)
+    return failed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="mom-generate", description="Generate minutes.json for .vtt transcripts.")
+    ap.add_argument("inputs", nargs="+", help=".vtt files, directories (searched recursively) or glob patterns")
+    ap.add_argument("-o", "--out-dir", help="write <name>.minutes.json here instead of next to each input")
+    ap.add_argument("--title", help="meeting title (default: the file name)")
+    ap.add_argument("-j", "--jobs", type=int, default=8, help="transcripts processed concurrently (default 8)")
+    ap.add_argument("--concurrency", type=int, help="max in-flight Groq requests across all files (GROQ_CONCURRENCY)")
+    ap.add_argument("--skip-existing", action="store_true", help="skip inputs whose output already exists")
+    args = ap.parse_args(argv)
+    if args.concurrency: core.GROQ_CONCURRENCY = args.concurrency
+    if not core.GROQ_API_KEY:
+        ap.error("GROQ_API_KEY is not set")
+    files = find_inputs(args.inputs)
+    if not files:
+        ap.error("no .vtt files matched")
+    root, seen = input_root(files), {}
+    for f in files:  # e.g. standup.vtt and standup.VTT given explicitly
+        dst = output_path(f, args.out_dir, root)
+        if dst in seen: ap.error(f"{seen[dst]} and {f} would both write {dst}")
+        seen[dst] = f
+    failed = asyncio.run(run(files, args.out_dir, args.title, max(1, args.jobs), args.skip_existing))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import re, time, asyncio, threading
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+# ----- Client-side pacing for Groq (OpenAI-compatible) rate limits -----
+# A concurrency cap limits in-flight requests; two token buckets pace requests/min and
+# tokens/min. Buckets start from configured limits and are re-synced from the
+# x-ratelimit-* / retry-after headers of every response, so pacing converges
+# on the account's real limits instead of discovering them through 429s.
+
+_DUR_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DUR_UNIT = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+
+def parse_duration(v):
+    # Groq resets look like "7.66s", "2m59.56s" or "120ms"; retry-after is plain seconds.
+    if v is None: return None
+    v = str(v).strip()
+    try:
+        return float(v)
+    except ValueError:
+        pass
+    parts = _DUR_RE.findall(v)
+    return sum(float(n)*_DUR_UNIT[u] for n, u in parts) if parts else None
+
+def _num(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.stamp = time.monotonic()
+
+    @property
+    def rate(self):  # refill per second
+        return self.capacity / 60
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.stamp)*self.rate)
+        self.stamp = now
+
+    def wait_time(self, amount, now):  # seconds until `amount` is available
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level)/self.rate
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, limit, remaining, now):
+        self._refill(now)
+        if limit: self.capacity = limit
+        if remaining is not None: self.level = min(self.level, remaining)
+
+# ----- Admission: one limiter shared by every run in the process -----
+# Background jobs each run their own event loop in a worker thread, so waiters
+# are futures on their own loops, granted through call_soon_threadsafe, and
+# the state is guarded by a threading lock. When a slot frees, it goes to the
+# meeting (tenant) with the fewest requests in flight, then to the shorter
+# meeting, then first come first served: every meeting gets a fair share and
+# a short standup is not stuck behind a three-hour all-hands. Requests carry
+# their tenant implicitly; extract_topics sets `tenant` to (id, chunk count).
+
+tenant = ContextVar("ratelimit_tenant", default=None)
+
+def _grant(fut):
+    if not fut.done(): fut.set_result(None)
+
+class RateLimiter:
+    def __init__(self, concurrency=4, rpm=30, tpm=6000):
+        self.concurrency = concurrency
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.pause_until = 0.0
+        self.in_flight = 0
+        self._mu = threading.Lock()
+        self._waiting = []        # [seq, tenant_id, size, tokens, loop, future]
+        self._active = Counter()  # tenant_id -> requests in flight
+        self._seq = 0
+        self._timer, self._timer_at = None, 0.0
+
+    def _order(self, w):
+        return self._active[w[1]], w[2], w[0]
+
+    async def acquire(self, tokens, tenant_id=None, size=0):
+        loop = asyncio.get_running_loop()
+        w = [0, tenant_id, size, tokens, loop, loop.create_future()]
+        with self._mu:
+            self._seq += 1
+            w[0] = self._seq
+            self._waiting.append(w)
+            self._dispatch()
+        try:
+            await w[5]
+        except BaseException:
+            with self._mu:
+                granted = not any(x is w for x in self._waiting)
+                if not granted: self._waiting.remove(w)
+            if granted: self.release(tenant_id)
+            raise
+
+    def release(self, tenant_id=None):
+        with self._mu:
+            self.in_flight -= 1
+            self._active[tenant_id] -= 1
+            if self._active[tenant_id] <= 0: del self._active[tenant_id]
+            self._dispatch()
+
+    def _dispatch(self):  # called with _mu held
+        while self._waiting and self.in_flight < self.concurrency:
+            w = min(self._waiting, key=self._order)
+            now = time.monotonic()
+            wait = max(self.pause_until - now, self.requests.wait_time(1, now), self.tokens.wait_time(w[3], now))
+            if wait > 0:
+                self._wake_in(wait, now)
+                return
+            self.requests.take(1, now); self.tokens.take(w[3], now)
+            self._waiting.remove(w)
+            self.in_flight += 1
+            self._active[w[1]] += 1
+            w[4].call_soon_threadsafe(_grant, w[5])
+
+    def _wake_in(self, delay, now):
+        if self._timer and self._timer_at <= now + delay: return
+        if self._timer: self._timer.cancel()
+        self._timer, self._timer_at = threading.Timer(delay, self._wake), now + delay
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _wake(self):
+        with self._mu:
+            self._timer = None
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tokens):
+        tid, size = tenant.get() or (None, 0)
+        await self.acquire(tokens, tid, size)
+        try:
+            yield self
+        finally:
+            self.release(tid)
+
+    def position(self, tenant_id):  # waiting requests admitted before this tenant's next one
+        with self._mu:
+            order = sorted(self._waiting, key=self._order)
+        return next((k for k, w in enumerate(order) if w[1] == tenant_id), None)
+
+    def observe(self, status, headers, used_tokens=None, estimated=None):
+        now = time.monotonic()
+        h = {k.lower(): v for k, v in (headers or {}).items()}
+        # Groq reports requests per *day* and tokens per minute, so only the
+        # token limit resizes a bucket; an exhausted daily quota pauses instead.
+        req_left = _num(h.get("x-ratelimit-remaining-requests"))
+        with self._mu:
+            self.tokens.sync(_num(h.get("x-ratelimit-limit-tokens")), _num(h.get("x-ratelimit-remaining-tokens")), now)
+            if used_tokens is not None and estimated is not None:
+                # settle the estimate against actual usage
+                self.tokens.level = min(self.tokens.capacity, self.tokens.level - (used_tokens - estimated))
+            retry = parse_duration(h.get("retry-after"))
+            if retry is None and req_left is not None and req_left < 1:
+                retry = parse_duration(h.get("x-ratelimit-reset-requests"))
+            if retry is None and status == 429:
+                retry = min(parse_duration(h.get("x-ratelimit-reset-tokens")) or 1.0, 60.0)
+            if retry:
+                self.pause_until = max(self.pause_until, now + retry)
+            self._dispatch()
+
+def estimate_tokens(text, completion=1024):
+    # ~4 chars/token for English prose, plus room for the JSON answer.
+    return len(text)//4 + completion
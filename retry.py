@@ -0,0 +1,28 @@
+import random
+
+# ----- Retry policy for transient Groq failures -----
+# Capped exponential backoff with full jitter. One policy is shared by all calls
+# of an extraction run, and its budget bounds the total number of retries, so a
+# hard outage fails fast instead of multiplying every chunk by max_attempts.
+# Cancellation needs no special handling: asyncio.CancelledError is not an
+# Exception, so it propagates straight through the retry loop and its sleeps.
+
+RETRY_STATUSES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+class RetryPolicy:
+    def __init__(self, max_attempts=4, base=1.0, cap=30.0, budget=20, rng=None):
+        self.max_attempts = max_attempts
+        self.base, self.cap = base, cap
+        self.budget = budget
+        self.retries = 0  # retries spent so far in this run
+        self._rng = rng or random.Random()
+
+    def allow(self, attempt):  # attempt is 1-based; consumes budget when True
+        if attempt >= self.max_attempts or self.retries >= self.budget:
+            return False
+        self.retries += 1
+        return True
+
+    def delay(self, attempt, retry_after=None):
+        d = self._rng.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+        return max(d, retry_after or 0)
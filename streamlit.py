@@ -1,169 +1,60 @@
-import re, json, asyncio, httpx, streamlit as st
+import io, json, hashlib, streamlit as st
+import mom_core as core
+import jobs, metrics
+from diagnostics import collect
 
 st.set_page_config(page_title="Minutes of Meeting Generator", layout="wide")
 
 # ----- Secrets (Streamlit Cloud: Settings → Secrets) -----
-# Required:
+# Same keys as the environment variables documented in mom_core; at minimum
 #   GROQ_API_KEY = "your_groq_api_key"
-# Optional:
-#   GROQ_MODEL   = "llama-3.1-8b-instant" (default below)
-#   DEBUG        = "true" to print raw exceptions
-GROQ_API_KEY = st.secrets.get("GROQ_API_KEY")
-GROQ_MODEL   = st.secrets.get("GROQ_MODEL", "llama-3.1-8b-instant")
-DEBUG        = (st.secrets.get("DEBUG") or "false").lower() == "true"
-
-# ----- VTT parsing & chunking (minimal) -----
-CUE_RE = re.compile(r"(?P<start>\d{2}:\d{2}:\d{2}\.\d{3})\s*-->\s*(?P<end>\d{2}:\d{2}:\d{2}\.\d{3})")
-SPEAKER_COLON = re.compile(r"^\s*([A-Z][\w .'\-]{0,40}):\s*(.*)$")
-
-def parse_vtt(raw: str):
-    lines = raw.splitlines()
-    out, i = [], 0
-    while i < len(lines):
-        m = CUE_RE.match(lines[i].strip())
-        if not m:
-            i += 1
-            continue
-        start, end = m.groups()
-        j = i + 1
-        texts = []
-        while j < len(lines) and lines[j].strip() != "" and not CUE_RE.match(lines[j]):
-            texts.append(lines[j].strip())
-            j += 1
-        text = " ".join(texts)
-        spkr, body = None, text
-        m1 = SPEAKER_COLON.match(text)
-        if m1:
-            spkr, body = m1.group(1), m1.group(2)
-        out.append({"start": start, "end": end, "speaker": spkr, "text": body})
-        i = j
-    return out
-
-def _sec(ts): 
-    h,m,s = ts.split(":"); s,ms = s.split(".")
-    return int(h)*3600 + int(m)*60 + int(s) + int(ms)/1000
-
-def merge_short(segs, gap=3):
-    merged=[]
-    for s in segs:
-        if merged and s["speaker"]==merged[-1]["speaker"]:
-            if 0 <= _sec(s["start"]) - _sec(merged[-1]["end"]) <= gap:
-                merged[-1]["end"]=s["end"]; merged[-1]["text"]+=" "+s["text"]; continue
-        merged.append(s)
-    return merged
-
-def chunk(segs, window=360, overlap=20):  # 6-min windows to reduce token risk
-    if not segs: return []
-    start_all, end_all = _sec(segs[0]["start"]), _sec(segs[-1]["end"])
-    out=[]; cur=start_all
-    while cur < end_all:
-        wend = cur + window
-        items = [s for s in segs if _sec(s["start"]) < wend and _sec(s["end"]) > cur]
-        out.append({"start":cur,"end":min(wend,end_all),"items":items})
-        cur = wend - overlap
-    return out
-
-def fmt_chunk(ch):
-    lines=[]
-    for s in ch["items"]:
-        sp = s["speaker"] or "Unknown"
-        lines.append(f'[{s["start"]}] {sp}: {s["text"]}')
-    return "\n".join(lines)
-
-# ----- Prompt (detailed discussion + crisp actions) -----
-def build_prompt(chunk_text: str) -> str:
-    return f"""
-You are a professional business meeting summarizer.
-
-Your goal is to generate structured minutes of meeting in detailed yet clear form.
-
-Return JSON in this structure:
-{{
-  "topics": [
-    {{
-      "title": "string",
-      "discussion": [
-        "Detailed bullet capturing what was said, the reasoning, decisions, and relevant context."
-      ],
-      "actions": [
-        {{"task": "short imperative action <= 20 words", "owner": "person/team or Unassigned", "due": "date if given or null"}}
-      ]
-    }}
-  ]
-}}
-
-Guidelines:
-- Discussion bullets should be rich and explanatory (who said what, why, context, decisions).
-- Actions must be crisp, imperative, and omit rationale (keep rationale in discussion).
-- Only include owners/dates when explicitly stated; otherwise owner="Unassigned", due=null.
-- Do not invent facts.
-
-Transcript:
-{chunk_text}
-"""
-
-# ----- Groq call with robust error reporting -----
-def _groq_error_text(resp_json: dict) -> str:
-    if resp_json is None:
-        return "Unknown error (no response body)."
-    try:
-        # OpenAI-compatible error shape
-        err = resp_json.get("error")
-        if err:
-            return f"{err.get('type','error').upper()}: {err.get('message','')}"
-    except Exception:
-        pass
-    # Fallback raw
-    try:
-        return json.dumps(resp_json)[:500]
-    except Exception:
-        return "Unspecified Groq error."
-
-async def call_groq(prompt: str):
-    if not GROQ_API_KEY:
-        return None, "GROQ_API_KEY is missing in Streamlit Secrets."
-    payload = {
-        "model": GROQ_MODEL,
-        "response_format": {"type": "json_object"},
-        "messages": [
-            {"role":"system","content":"Return ONLY valid JSON."},
-            {"role":"user","content": prompt}
-        ],
-        "temperature": 0.2
-    }
-    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    try:
-        async with httpx.AsyncClient(timeout=120) as client:
-            r = await client.post(url, headers=headers, json=payload)
-    except Exception as e:
-        if DEBUG: st.exception(e)
-        return None, f"Network error calling Groq: {repr(e)}"
-    if r.status_code >= 400:
-        try:
-            body = r.json()
-        except Exception:
-            body = None
-        return None, f"HTTP {r.status_code}: {_groq_error_text(body)}"
-    try:
-        txt = r.json()["choices"][0]["message"]["content"]
-        return json.loads(txt), None
-    except Exception as e:
-        if DEBUG: st.exception(e)
-        return None, f"Parse error: {repr(e)} (model returned non-JSON?)"
-
-# ----- Extraction orchestration (collects errors) -----
-async def extract_topics(chunks):
-    topics, errors = [], []
-    async def run(c):
-        prompt = build_prompt(fmt_chunk(c))
-        result, err = await call_groq(prompt)
-        if err: errors.append(err)
-        return result or {"topics": []}
-    results = await asyncio.gather(*[run(c) for c in chunks])
-    for r in results:
-        topics.extend(r.get("topics", []))
-    return topics, errors
+core.configure(st.secrets)
+core.on_exception = st.exception
+
+@st.cache_resource
+def get_llm_cache():  # one SQLite-backed cache shared by all sessions
+    return core.make_llm_cache()
+
+@st.cache_resource
+def get_jobs():  # one worker pool and job table shared by all sessions
+    return jobs.JobQueue(core.JOBS_PATH, core.JOB_WORKERS, get_llm_cache(), core.JOB_TTL_DAYS*86400)
+
+@st.cache_resource
+def start_metrics():  # one Prometheus endpoint per server process
+    return metrics.serve(core.METRICS_PORT) if core.METRICS_PORT else None
+
+start_metrics()
+
+# ----- Memoized pipeline stages (keyed by the upload's sha256) -----
+@st.cache_data(max_entries=16, show_spinner=False)
+def parse_stage(digest, _data):
+    return core.parse_transcript(io.BytesIO(_data))
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def chunk_stage(digest, _segs, model, budget, ceiling):
+    return core.chunk_transcript(_segs, budget, ceiling=ceiling)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def estimate_stage(digest, _chs, model, budget, ceiling):
+    return core.estimate_usage(_chs)
+
+# Polls the background job; topics show up as chunks complete, in time order.
+@st.fragment(run_every=1.0)
+def job_progress(key):
+    job = get_jobs().get(key)
+    if not job or job["status"] not in ("queued", "running"):
+        st.rerun()
+    waiting = get_jobs().position(key)
+    if job["status"] == "queued" or job["total"] is None:
+        st.caption("Waiting for a free worker…" + (f" ({waiting[1]} meetings ahead)" if waiting and waiting[1] else ""))
+    else:
+        st.caption(f"Summarized {job['done']}/{job['total']} parts of the meeting…")
+        if waiting and waiting[0] == "groq" and waiting[1]:
+            st.caption(f"Queue position {waiting[1] + 1}: Groq requests from other meetings go first.")
+    for t in job["partial"]:
+        st.markdown(f"**{t.get('title','(untitled)')}**")
+        for d in t.get("discussion", []):
+            st.markdown(f"- {d}")
 
 # ----- UI -----
 st.title("📋 Minutes of Meeting")
@@ -171,18 +62,50 @@ st.title("📋 Minutes of Meeting")
 meeting_title = st.text_input("Meeting title", "Project Discussion")
 vtt = st.file_uploader("Upload .vtt transcript", type=["vtt"])
 
-if st.button("Generate Minutes", type="primary") and vtt:
-    raw = vtt.getvalue().decode("utf-8", "ignore")
-    segs = merge_short(parse_vtt(raw))
+if vtt:
+    data = vtt.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    segs = parse_stage(digest, data)
     if not segs:
         st.error("No cues found in file.")
         st.stop()
-
-    duration_min = int(round((_sec(segs[-1]['end']) - _sec(segs[0]['start']))/60))
-    chs = chunk(segs, window=360, overlap=20)
-
-    with st.spinner("Summarizing..."):
-        topics, errors = asyncio.run(extract_topics(chs))
+    chunk_key = (core.GROQ_MODEL, core.chunk_budget()[0], core.MEETING_TOKEN_CEILING)
+    duration_min, chs = chunk_stage(digest, segs, *chunk_key)
+
+    # Pre-flight: what sending these chunks would cost, before anything is sent
+    with st.expander(f"Estimated usage: {len(chs)} requests"):
+        st.caption("Upper bound: prompt tokens estimated from the text, plus the full completion reserve per request.")
+        st.table(estimate_stage(digest, chs, *chunk_key))
+        trimmed = sum(c.get("trimmed", 0) for c in chs)
+        if trimmed:
+            st.warning(f"Over MEETING_TOKEN_CEILING ({core.MEETING_TOKEN_CEILING} tokens): {trimmed} short segments were left out.")
+
+# Summarizing runs as a background job keyed by the transcript and settings;
+# the key goes in the URL so a reload (which drops the upload and session
+# state) re-attaches to the same job. Re-clicking on an unchanged upload reuses
+# the finished job unless some chunks failed; those are retried (successful
+# ones hit the LLM cache, and chunks unchanged since this session's last run
+# are reused).
+if st.button("Generate Minutes", type="primary") and vtt:
+    key = jobs.job_key(digest)
+    get_jobs().submit(key, data, reuse=st.session_state.setdefault("chunk_results", {}))
+    st.query_params["job"] = key
+
+key = st.query_params.get("job")
+if vtt and key != jobs.job_key(digest):
+    key = None  # a different upload than the job's
+job = get_jobs().get(key) if key else None
+
+if job and job["status"] in ("queued", "running"):
+    job_progress(key)
+elif job and job["status"] == "failed":
+    st.error(f"Summarizing failed: {job['error']}")
+
+# Rendered on every rerun for the current job, so widget changes such as a new
+# meeting title redraw the summary and email without re-running the pipeline.
+if job and job["status"] == "done":
+    minutes = job["result"]
+    duration_min, topics, errors = minutes["duration_min"], minutes["topics"], minutes["errors"]
 
     # Structured results
     st.subheader("Structured Summary")
@@ -203,47 +126,45 @@ if st.button("Generate Minutes", type="primary") and vtt:
     # Email draft (always produces output, includes reason if empty)
     st.divider()
     st.subheader("✉️ Email Draft")
-    lines = [
-        f"Subject: Minutes of Meeting – {meeting_title}",
-        "",
-        "Please find the meeting minutes below:",
-        "",
-        "**Key Discussion Points, Actions & Decisions -**",
-        ""
-    ]
-    if topics:
-        for t in topics:
-            lines.append(f"**{t.get('title','(untitled)')}**")
-            for d in t.get("discussion", []):
-                lines.append(f"*   {d}")
-            for a in t.get("actions", []):
-                task=a.get("task",""); own=a.get("owner","Unassigned"); due=a.get("due") or "-"
-                lines.append(f"*   **[Action] {task} — Owner: {own}, Due: {due}.**")
-            lines.append("")
-    else:
-        reason = errors[0] if errors else "No extractable content detected or input too large."
-        lines.append(f"_Note: No topics could be extracted. Reason: {reason}_")
-        lines.append("")
-
-    draft = "\n".join(lines + ["Regards,", "Automated MoM Assistant"])
+    with collect(core.DIAGNOSTICS) as render_stats:  # rendered here per rerun, not in the job
+        draft = core.render_email_draft(meeting_title, topics, errors)
     st.text_area("Email Draft", value=draft, height=380)
 
     if errors:
         st.error("LLM reported the following issue(s):")
         for e in errors:
             st.write(f"- {e}")
-        if DEBUG:
+        if core.DEBUG:
             st.caption("DEBUG is true — raw error details were printed above (if any).")
 
+    usage = minutes["usage"]
+    if "actual" in usage:
+        a = usage["actual"]
+        cost = f", ${a['cost_usd']:.4f}" if a["cost_usd"] is not None else ""
+        st.caption(f"Groq usage: {a['requests']} requests, {a['prompt_tokens']} prompt + "
+                   f"{a['completion_tokens']} completion tokens{cost} ({a['cache_hits']} answers from cache).")
+
+    diagnostics = minutes["diagnostics"]
+    if diagnostics and render_stats:
+        diagnostics = {**diagnostics, "stages": {**diagnostics["stages"], **render_stats.as_dict()["stages"]}}
+    if diagnostics:
+        with st.expander("Run diagnostics"):
+            st.caption("Wall time per stage (concurrent Groq calls add up) and run counters.")
+            st.table([{"stage": k, **v} for k, v in diagnostics["stages"].items()])
+            st.table([{"counter": k, "value": v} for k, v in diagnostics["counters"].items()])
+    routing = minutes.get("routing")
+    if routing:
+        with st.expander("Model routing"):
+            st.caption("Model that answered each chunk, and every attempt when a model was overloaded or the prompt too long.")
+            st.table([{"chunk": r["chunk"], "prompt tokens": r["prompt_tokens"],
+                       "model": "(reused)" if r.get("reused") else "(split in halves)" if r.get("split") else r.get("model") or "-",
+                       "attempts": ", ".join(f"{m} {o}" for m, o in r.get("attempts", [])),
+                       "seconds": r.get("seconds")} for r in routing])
+
     st.download_button(
         "Download minutes.json",
-        data=json.dumps({
-            "meeting_title": meeting_title,
-            "duration_min": duration_min,
-            "topics": topics,
-            "email_draft": draft,
-            "errors": errors
-        }, indent=2),
+        data=json.dumps(core.minutes_payload(meeting_title, duration_min, topics, draft, errors, diagnostics, usage,
+                                            minutes.get("routing")), indent=2),
         file_name="minutes.json",
         mime="application/json"
     )
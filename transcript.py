@@ -0,0 +1,312 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+
+# ----- VTT parsing & chunking (minimal) -----
+# Timestamps are HH:MM:SS.mmm or the short MM:SS.mmm form, with "." or "," before
+# the milliseconds; hours may run past two digits.
+def _ts_re(p):
+    return rf"(?P<{p}>(?:(?P<{p}h>\d{{2,}}):)?(?P<{p}m>\d{{2}}):(?P<{p}s>\d{{2}})[.,](?P<{p}f>\d{{3}}))"
+CUE_RE = re.compile(_ts_re("start") + r"\s*-->\s*" + _ts_re("end"))
+TS_RE = re.compile(_ts_re("t"))
+SPEAKER_COLON = re.compile(r"^\s*([A-Z][\w .'\-]{0,40}):\s*(.*)$")
+
+def _groups_ms(h, m, s, f):
+    return ((int(h or 0)*60 + int(m))*60 + int(s))*1000 + int(f)
+
+# Reads any iterable of lines (a text or binary file object, or a list of str) and
+# yields cues one at a time, so large transcripts never sit in memory whole.
+# start/end keep the timestamp text as written (for display); start_ms/end_ms
+# are parsed once here and used for all timing arithmetic downstream.
+def iter_vtt(stream):
+    for start, end, start_ms, end_ms, spkr, body in _iter_cues(stream):
+        yield {"start": start, "end": end, "start_ms": start_ms, "end_ms": end_ms, "speaker": spkr, "text": body}
+
+def _iter_cues(stream):
+    cue = None  # (match, texts) of the cue being collected
+    for line in stream:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "ignore")
+        line = line.rstrip("\r\n")
+        if cue is not None:
+            if line.strip() != "" and not CUE_RE.match(line):
+                cue[1].append(line.strip())
+                continue
+            yield _cue(*cue)
+            cue = None
+        m = CUE_RE.match(line.strip())
+        if m:
+            cue = (m, [])
+    if cue is not None:
+        yield _cue(*cue)
+
+def _cue(m, texts):
+    start, sh, sm, ss, sf, end, eh, em, es, ef = m.groups()
+    start_ms, end_ms = _groups_ms(sh, sm, ss, sf), _groups_ms(eh, em, es, ef)
+    text = " ".join(texts)
+    m1 = SPEAKER_COLON.match(text)
+    if m1:
+        return start, end, start_ms, end_ms, m1.group(1), m1.group(2)
+    return start, end, start_ms, end_ms, None, text
+
+def parse_vtt(raw: str):
+    return list(iter_vtt(raw.splitlines()))
+
+def _ms(ts):
+    m = TS_RE.fullmatch(ts.strip())
+    if not m: raise ValueError(f"Bad timestamp: {ts!r}")
+    return _groups_ms(*m.group("th", "tm", "ts", "tf"))
+
+def _ms_sec(ms):  # seconds as whole + fractional part, as the old string parser computed them
+    return ms // 1000 + (ms % 1000)/1000
+
+def _ts(ms):
+    h, ms = divmod(ms, 3600000); m, ms = divmod(ms, 60000); s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+# Segment times in ms; dicts not produced by iter_vtt fall back to their strings.
+def _start_ms(s):
+    v = s.get("start_ms"); return _ms(s["start"]) if v is None else v
+
+def _end_ms(s):
+    v = s.get("end_ms"); return _ms(s["end"]) if v is None else v
+
+def iter_merge_short(segs, gap=3):
+    last, gap_ms = None, gap*1000
+    for s in segs:
+        if last is not None and s["speaker"]==last["speaker"]:
+            if 0 <= _start_ms(s) - _end_ms(last) <= gap_ms:
+                last["end"]=s["end"]; last["end_ms"]=_end_ms(s); last["text"]+=" "+s["text"]; continue
+        if last is not None: yield last
+        last = s
+    if last is not None: yield last
+
+def merge_short(segs, gap=3):
+    if isinstance(segs, SegmentTable): return segs.merge_short(gap)
+    return list(iter_merge_short(segs, gap))
+
+# ----- Columnar segment store -----
+# Segments stored column-wise: int32 millisecond times, speakers as codes into a
+# shared name list (-1 = no speaker) and text as (offset, length) into one
+# shared string. Rows read back as the usual {"start","end","speaker","text"}
+# dicts, so fmt_chunk and the UI need no changes; merge_short() and chunk()
+# work on the columns directly.
+class SegmentTable:
+    def __init__(self, speakers=None, buf=""):
+        self.start_ms, self.end_ms, self.spk = array("i"), array("i"), array("i")
+        self.txt_off, self.txt_len = array("q"), array("i")
+        self.speakers = speakers if speakers is not None else []
+        self._codes = {n: k for k, n in enumerate(self.speakers)}
+        self.buf, self._pending, self._size = buf, [], len(buf)
+
+    @classmethod
+    def from_vtt(cls, stream):
+        t = cls()
+        t.extend((start_ms, end_ms, t.code(spkr), body) for _, _, start_ms, end_ms, spkr, body in _iter_cues(stream))
+        return t.freeze()
+
+    def _derive(self):  # empty table sharing this one's speaker codes
+        t = SegmentTable(self.speakers)
+        t._codes = self._codes
+        return t
+
+    def code(self, speaker):
+        if speaker is None: return -1
+        c = self._codes.get(speaker)
+        if c is None:
+            c = self._codes[speaker] = len(self.speakers)
+            self.speakers.append(speaker)
+        return c
+
+    def extend(self, rows):  # rows of (start_ms, end_ms, speaker_code, text)
+        sa, ea, ca = self.start_ms.append, self.end_ms.append, self.spk.append
+        oa, la, pa = self.txt_off.append, self.txt_len.append, self._pending.append
+        size = self._size
+        for start, end, code, text in rows:
+            sa(start); ea(end); ca(code); oa(size); la(len(text)); pa(text)
+            size += len(text)
+        self._size = size
+
+    def freeze(self):  # fold appended text into the shared buffer
+        if self._pending:
+            self.buf += "".join(self._pending); self._pending = []
+        return self
+
+    def __len__(self):
+        return len(self.start_ms)
+
+    def text(self, k):
+        o = self.txt_off[k]; return self.buf[o:o+self.txt_len[k]]
+
+    def speaker(self, k):
+        c = self.spk[k]; return None if c < 0 else self.speakers[c]
+
+    def row(self, k):
+        sms, ems = self.start_ms[k], self.end_ms[k]
+        return {"start": _ts(sms), "end": _ts(ems), "start_ms": sms, "end_ms": ems,
+                "speaker": self.speaker(k), "text": self.text(k)}
+
+    def __getitem__(self, k):
+        if isinstance(k, slice): return self.take(range(len(self))[k])
+        if k < 0: k += len(self)
+        if not 0 <= k < len(self): raise IndexError(k)
+        return self.row(k)
+
+    def __iter__(self):
+        return (self.row(k) for k in range(len(self)))
+
+    def take(self, idx):  # row subset; shares speakers and the text buffer
+        t = self._derive()
+        t.buf = self.buf; t._size = len(self.buf)
+        for col in ("start_ms", "end_ms", "spk", "txt_off", "txt_len"):
+            src = getattr(self, col)
+            getattr(t, col).extend(src[k] for k in idx)
+        return t
+
+    def merge_short(self, gap=3):
+        out = self._derive()
+        out.extend(self._merged_rows(gap*1000))
+        return out.freeze()
+
+    def _merged_rows(self, gap_ms):
+        spk, sms, ems, n, k = self.spk, self.start_ms, self.end_ms, len(self), 0
+        while k < n:
+            code, start, end, texts = spk[k], sms[k], ems[k], [self.text(k)]
+            k += 1
+            while k < n and spk[k] == code and 0 <= sms[k] - end <= gap_ms:
+                end = ems[k]; texts.append(self.text(k)); k += 1
+            yield start, end, code, " ".join(texts)
+
+# ----- Windowing engine -----
+# Start/end seconds are computed once; each window is then located with two
+# bisects over the start times and a running max of end times, so chunking is
+# O(n log n + windows + output) instead of a full scan per window.
+# Yields (win_start, win_end, idx) where idx are overlapping segment positions in input order.
+def windows(starts, ends, t0, t1, window=360, overlap=20):
+    n = len(starts)
+    order = None
+    if any(starts[k] > starts[k+1] for k in range(n-1)):
+        order = sorted(range(n), key=starts.__getitem__)
+        starts = [starts[k] for k in order]
+        ends = [ends[k] for k in order]
+    reach, hi_end = [], float("-inf")  # reach[k] = max(ends[:k+1]), non-decreasing
+    for e in ends:
+        if e > hi_end: hi_end = e
+        reach.append(hi_end)
+    cur = t0
+    while cur < t1:
+        wend = cur + window
+        lo, hi = bisect_right(reach, cur), bisect_left(starts, wend)
+        idx = [k for k in range(lo, hi) if ends[k] > cur]
+        if order is not None:
+            idx = sorted(order[k] for k in idx)
+        yield cur, min(wend, t1), idx
+        cur = wend - overlap
+
+def chunk(segs, window=360, overlap=20):  # 6-min windows to reduce token risk
+    if isinstance(segs, SegmentTable):
+        if not len(segs): return []
+        starts, ends = [_ms_sec(v) for v in segs.start_ms], [_ms_sec(v) for v in segs.end_ms]
+        return [{"start":ws,"end":we,"items":segs.take(idx)}
+                for ws, we, idx in windows(starts, ends, starts[0], ends[-1], window, overlap)]
+    if not isinstance(segs, list): return list(iter_chunks(segs, window, overlap))
+    if not segs: return []
+    starts = [_ms_sec(_start_ms(s)) for s in segs]
+    ends = [_ms_sec(_end_ms(s)) for s in segs]
+    return [{"start":ws,"end":we,"items":[segs[k] for k in idx]}
+            for ws, we, idx in windows(starts, ends, starts[0], ends[-1], window, overlap)]
+
+# Streaming counterpart of chunk(): consumes segments lazily (they must be ordered
+# by start time, as WebVTT requires) and emits each window as soon as a segment
+# starting past its end arrives, buffering only the segments still in range.
+def iter_chunks(segs, window=360, overlap=20):
+    buf, cur, last_end = [], None, None
+    for s in segs:
+        t, last_end = _ms_sec(_start_ms(s)), _ms_sec(_end_ms(s))
+        if cur is None: cur = t
+        while t >= cur + window:
+            wend = cur + window
+            yield {"start":cur,"end":wend,"items":[x for x, _, e in buf if e > cur]}
+            cur = wend - overlap
+            buf = [x for x in buf if x[2] > cur]
+        buf.append((s, t, last_end))
+    if cur is None: return
+    while cur < last_end:
+        wend = cur + window
+        yield {"start":cur,"end":min(wend,last_end),"items":[x for x, b, e in buf if b < wend and e > cur]}
+        cur = wend - overlap
+        buf = [b for b in buf if b[2] > cur]
+
+# ----- Token-budget chunking -----
+# Packs segments greedily until the estimated prompt (fmt_chunk lines plus a
+# fixed `overhead` for the instructions) would exceed `budget` tokens. Once a
+# chunk is at least `fill` full, it is closed at the best boundary in its tail:
+# the longest silence, with a bonus for a speaker change. The next chunk
+# re-includes segments ending within `overlap` seconds of the cut.
+# A single segment larger than the budget becomes a chunk of its own.
+def _line_costs(segs, chars_per_token):
+    if isinstance(segs, SegmentTable):
+        starts, ends, spk = segs.start_ms, segs.end_ms, segs.spk
+        names = [len(n) for n in segs.speakers]
+        costs = [(len(_ts(starts[k])) + 6 + (names[spk[k]] if spk[k] >= 0 else 7) + segs.txt_len[k]) / chars_per_token
+                 for k in range(len(segs))]
+        return list(starts), list(ends), list(spk), costs
+    starts, ends, spk, costs = [], [], [], []
+    for s in segs:
+        starts.append(_start_ms(s)); ends.append(_end_ms(s)); spk.append(s["speaker"])
+        costs.append((len(s["start"]) + 6 + len(s["speaker"] or "Unknown") + len(s["text"])) / chars_per_token)
+    return starts, ends, spk, costs
+
+def token_spans(starts, ends, spk, costs, budget, overhead=0, overlap=20, fill=0.6):
+    n, room = len(costs), max(1.0, budget - overhead)
+    i = 0
+    while i < n:
+        total, j = 0.0, i
+        while j < n and (j == i or total + costs[j] <= room):
+            total += costs[j]; j += 1
+        cut = j
+        if j < n:  # choose the split in the tail of the packed range
+            best, acc, reach = None, 0.0, ends[i]
+            for b in range(i+1, j+1):
+                acc += costs[b-1]
+                reach = max(reach, ends[b-1])
+                if acc < fill*room: continue
+                nxt = starts[b] if b < n else reach
+                score = max(0, nxt - reach)/1000 + (1.0 if spk[b-1] != spk[b] else 0.0)
+                if best is None or score >= best: best, cut = score, b
+        yield i, cut
+        if cut >= n: break
+        k, bound = cut, starts[cut] - overlap*1000
+        while k - 1 > i and ends[k-1] > bound:
+            k -= 1
+        i = k
+
+def chunk_by_tokens(segs, budget=3000, overhead=0, overlap=20, chars_per_token=4):
+    if not len(segs): return []
+    table = isinstance(segs, SegmentTable)
+    starts, ends, spk, costs = _line_costs(segs, chars_per_token)
+    out = []
+    for i, j in token_spans(starts, ends, spk, costs, budget, overhead, overlap):
+        items = segs.take(range(i, j)) if table else segs[i:j]
+        out.append({"start":_ms_sec(starts[i]),"end":_ms_sec(max(ends[i:j])),"items":items})
+    return out
+
+# Keeps a chunk's longest lines that fit in `budget` tokens, in time order;
+# short interjections are dropped first. "trimmed" counts the dropped segments.
+def trim_chunk(ch, budget, chars_per_token=4):
+    items = ch["items"]
+    costs = _line_costs(items, chars_per_token)[3]
+    keep, total = [], 0.0
+    for k in sorted(range(len(costs)), key=lambda k: -costs[k]):
+        if total + costs[k] <= budget:
+            keep.append(k); total += costs[k]
+    keep.sort()
+    kept = items.take(keep) if isinstance(items, SegmentTable) else [items[k] for k in keep]
+    return {**ch, "items": kept, "trimmed": ch.get("trimmed", 0) + len(costs) - len(keep)}
+
+def fmt_chunk(ch):
+    lines=[]
+    for s in ch["items"]:
+        sp = s["speaker"] or "Unknown"
+        lines.append(f'[{s["start"]}] {sp}: {s["text"]}')
+    return "\n".join(lines)
@@ -0,0 +1,59 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ----- Token usage: pre-flight estimates and post-run accounting -----
+# Estimates count each request's prompt from its text (~4 chars per token) and
+# the full completion reserve, so they are an upper bound. Actual figures come
+# from the `usage` blocks Groq returns, recorded into the Counter opened by
+# `with tally() as used:` (like diagnostics.collect, but always on: turning
+# DIAGNOSTICS off doesn't drop the accounting). Prices are Groq on-demand USD
+# per million (input, output) tokens; models without a price are reported in
+# tokens only.
+
+MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "mixtral-8x7b-32768": (0.24, 0.24),
+    "gemma2-9b-it": (0.20, 0.20),
+}
+
+_current = ContextVar("usage_tally", default=None)
+
+@contextmanager
+def tally():
+    used = Counter()
+    token = _current.set(used)
+    try:
+        yield used
+    finally:
+        _current.reset(token)
+
+def record(name, n=1):
+    used = _current.get()
+    if used is not None and n: used[name] += n
+
+def cost_usd(model, prompt_tokens, completion_tokens):
+    price = MODEL_PRICES.get(model)
+    if not price: return None
+    return round((prompt_tokens*price[0] + completion_tokens*price[1]) / 1e6, 6)
+
+# prompt_tokens: estimated prompt size of every request the run will send
+def estimate(model, prompt_tokens, completion, context):
+    p, c = sum(prompt_tokens), completion*len(prompt_tokens)
+    return {"model": model, "requests": len(prompt_tokens), "prompt_tokens": p, "completion_tokens_max": c,
+            "over_context": sum(t + completion > context for t in prompt_tokens),
+            "cost_usd_max": cost_usd(model, p, c)}
+
+# counters hold "<model>/prompt_tokens" and "<model>/completion_tokens" per routed model
+def actual(counters):
+    models = {}
+    for k, v in counters.items():
+        model, _, kind = k.rpartition("/")
+        if model and kind in ("prompt_tokens", "completion_tokens"):
+            models.setdefault(model, {"prompt_tokens": 0, "completion_tokens": 0})[kind] += v
+    costs = [cost_usd(m, t["prompt_tokens"], t["completion_tokens"]) for m, t in models.items()]
+    for m, c in zip(models, costs): models[m]["cost_usd"] = c
+    return {"requests": counters.get("requests", 0), "cache_hits": counters.get("cache_hits", 0),
+            "prompt_tokens": counters.get("prompt_tokens", 0), "completion_tokens": counters.get("completion_tokens", 0),
+            "cost_usd": None if None in costs else round(sum(costs), 6), "models": models}